@@ -12,11 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import os
+import sys
 from collections import defaultdict
 from dimod import BinaryQuadraticModel as BQM
 import networkx as nx
 import dwave.embedding
-from dwave.system import DWaveSampler, EmbeddingComposite
+from dwave.system import DWaveSampler
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, GrayCodeSolver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--exact', action='store_true', help='solve exactly by enumerating every state instead of sampling')
+args = parser.parse_args()
 
 # Create Q matrix
 Q = defaultdict(int)
@@ -117,7 +128,10 @@ for i in range(1,5):
 input()
 print("\nSending problem to QPU...")
 
-sampler = EmbeddingComposite(DWaveSampler(solver={'qpu': True})) # Use EmbeddingComposite to work around any missing qubits
+if args.exact:
+    sampler = GrayCodeSolver() # 4 qubits: all 16 states are enumerated
+else:
+    sampler = CachedEmbeddingComposite(DWaveSampler(solver={'qpu': True})) # Use CachedEmbeddingComposite to work around any missing qubits
 sampleset = sampler.sample_ising(th, tJ, num_reads=10, label='Training - QUBO Lifecycle')
 
 print("\nBest QMI solution found:\n")
@@ -17,9 +17,17 @@
 #Given three boxes with values 17, 21, and 19, the BQM program returns the pair of boxes with the
 #smallest sum.
 
-from dwave.system import DWaveSampler, EmbeddingComposite
+import argparse
+import os
+import sys
+
+from dwave.system import DWaveSampler
 from dimod import BinaryQuadraticModel
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, GrayCodeSolver, LocalIsingSampler
+
 # Define your BQM
 def get_bqm(S):
     """Returns a dictionary representing a QUBO.
@@ -60,11 +68,19 @@ def run_on_qpu(bqm, sampler):
 ## ------- Main program -------
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+    parser.add_argument('--exact', action='store_true', help='solve exactly by enumerating every state instead of sampling')
+    args = parser.parse_args()
+
     S = [17, 21, 19]
 
     bqm = get_bqm(S)
 
-    sampler = EmbeddingComposite(DWaveSampler())
+    if args.exact:
+        sampler = GrayCodeSolver()
+    else:
+        sampler = LocalIsingSampler() if args.local else CachedEmbeddingComposite(DWaveSampler())
 
     sample_set = run_on_qpu(bqm, sampler)
     
@@ -13,10 +13,11 @@
 # limitations under the License.
 
 # ------ Import necessary packages ----
+import os
+import sys
 from collections import defaultdict
 
 from dwave.system import DWaveSampler, FixedEmbeddingComposite
-from minorminer import find_embedding
 import networkx as nx
 
 import matplotlib
@@ -28,6 +29,10 @@ except ImportError:
 
 import dwave.inspector #import for visual problem inspector!
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import EmbeddingCache
+
 # ------- Set up our graph -------
 
 # Create empty graph
@@ -54,7 +59,7 @@ num_reads = 10
 
 # Run the QUBO on a solver with the specified topology
 QPU = DWaveSampler(solver={'topology__type__eq': 'chimera'}) #here update with the topology of interest! chimera, pegasus..
-embedding = find_embedding(Q, QPU.edgelist)
+embedding = EmbeddingCache().find_embedding(Q, QPU.edgelist) #found once per QUBO and topology, then read from .cache/embeddings
 
 print("\nEmbedding found:\n", embedding)
 
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import os
+import sys
+
 # Import networkx for graph tools
 import networkx as nx
 
@@ -19,19 +23,28 @@ import networkx as nx
 import dwave_networkx as dnx
 
 # Import dwave.system packages for the QPU
-from dwave.system import DWaveSampler, EmbeddingComposite
+from dwave.system import DWaveSampler
 
 # Import matplotlib.pyplot to draw graphs on screen
 import matplotlib
 matplotlib.use("agg")
 import matplotlib.pyplot as plt
-import dwave.inspector
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, ComponentSampler, LocalIsingSampler
+
+def qpu_sampler():
+    '''Returns the QPU sampler (called once per worker process by ComponentSampler)'''
+
+    return CachedEmbeddingComposite(DWaveSampler())
 
 # Set the solver we're going to use
-def set_sampler():
-    '''Returns a dimod sampler'''
+def set_sampler(local=False):
+    '''Returns a dimod sampler that solves each connected component of the graph separately,
+    on the QPU or on the local Ising sampler when local is True'''
 
-    sampler = EmbeddingComposite(DWaveSampler())
+    sampler = ComponentSampler([(None, LocalIsingSampler if local else qpu_sampler)])
 
     return sampler
 
@@ -63,9 +76,13 @@ def solve_problem(G, sampler):
 ## ------- Main program -------
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+    args = parser.parse_args()
+
     G = create_graph()
 
-    sampler = set_sampler()
+    sampler = set_sampler(args.local)
 
     # Find the maximum independent set, S
     S = solve_problem(G, sampler)
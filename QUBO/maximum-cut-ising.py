@@ -13,13 +13,24 @@
 # limitations under the License.
 
 # ------ Import necessary packages ----
+import argparse
+import os
+import sys
 from collections import defaultdict
 
 from dwave.system.samplers import DWaveSampler
-from dwave.system.composites import EmbeddingComposite
 from matplotlib import pyplot as plt
 import networkx as nx
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, GrayCodeSolver, LocalIsingSampler
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+parser.add_argument('--exact', action='store_true', help='solve exactly by enumerating every state instead of sampling')
+args = parser.parse_args()
+
 # ------- Set up our graph -------
 
 # Create empty graph
@@ -44,7 +55,10 @@ chainstrength = 2
 numruns = 10
 
 # Run the QUBO on the solver from your config file
-sampler = EmbeddingComposite(DWaveSampler())
+if args.exact:
+    sampler = GrayCodeSolver()
+else:
+    sampler = LocalIsingSampler() if args.local else CachedEmbeddingComposite(DWaveSampler())
 response = sampler.sample_ising(h, J,
                                 chain_strength=chainstrength,
                                 num_reads=numruns,
@@ -33,16 +33,31 @@
 #resilient network by providing many redundant connections between groups in case
 #one connection fails.
 
+import argparse
+import os
+import sys
 from collections import defaultdict
 
 from dwave.system.samplers import DWaveSampler
-from dwave.system.composites import EmbeddingComposite
 import networkx as nx
 
 import matplotlib
 matplotlib.use("agg")
 from matplotlib import pyplot as plt
-import dwave.inspector
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, ComponentSampler, GrayCodeSolver, LocalIsingSampler
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+parser.add_argument('--exact', action='store_true', help='solve exactly by enumerating every state instead of sampling')
+args = parser.parse_args()
+
+def chimera_sampler():
+    '''Returns the QPU sampler (called once per worker process by ComponentSampler)'''
+
+    return CachedEmbeddingComposite(DWaveSampler(solver={'topology__type':'chimera'}))
 
 # ------- Set up our graph -------
 
@@ -68,13 +83,20 @@ for i, j in G.edges:
 #chainstrength = 0.5
 numruns = 10
 
-# Run the QUBO on the solver from your config file
-sampler = EmbeddingComposite(DWaveSampler(solver={'topology__type':'chimera'}))
+# Run the QUBO on the solver from your config file, one connected component of the
+# graph at a time (a connected graph is sent as it is, so the inspector still works)
+if args.exact:
+    sampler = GrayCodeSolver()
+else:
+    sampler = ComponentSampler([(None, LocalIsingSampler if args.local else chimera_sampler)])
 response = sampler.sample_qubo(Q,
                                #chain_strength=chainstrength,
                                num_reads=numruns,
                                label='Example - Maximum Cut')
-dwave.inspector.show(response)
+if not (args.local or args.exact):
+    # The inspector is only needed (and installed) where the QPU is used
+    import dwave.inspector
+    dwave.inspector.show(response)
 
 # ------- Print results to user -------
 print('-' * 60)
@@ -17,7 +17,15 @@
 #The number partitioning problem begins with a set of numbers, S.  We must split
 #the set of numbers into two sets with equal sum.
 
-from dwave.system import DWaveSampler, EmbeddingComposite
+import argparse
+import os
+import sys
+
+from dwave.system import DWaveSampler
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, GrayCodeSolver, LocalIsingSampler
 
 # Define your QUBO dictionary
 def get_qubo(S):
@@ -63,6 +71,11 @@ def run_on_qpu(Q, sampler):
 ## ------- Main program -------
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+    parser.add_argument('--exact', action='store_true', help='solve exactly by enumerating every state instead of sampling')
+    args = parser.parse_args()
+
     ## ------- Set up our list of numbers -------
     S = [25, 7, 13, 31, 42, 17, 21, 10]
 
@@ -72,7 +85,10 @@ if __name__ == "__main__":
 
     ## ------- Run our QUBO on the QPU -------
 
-    sampler = EmbeddingComposite(DWaveSampler())
+    if args.exact:
+        sampler = GrayCodeSolver()
+    else:
+        sampler = LocalIsingSampler() if args.local else CachedEmbeddingComposite(DWaveSampler())
 
     sample_set = run_on_qpu(Q, sampler)
 
@@ -14,6 +14,8 @@ import time
 
 import neal
 
+from utilities import get_sampler
+
 import matplotlib.pyplot as plt
 
 dataDir = r'employees-scheduling/SCAD_TSA_simulated_data_final_v3.xlsx'
@@ -196,7 +198,7 @@ def staff_schedule_simulated(n_employees, dataDir):
 
     bqm = 2*obj_func + const_1 + const_2 + const_3 + 3*const_4 + const_5 #here weights of constraints can be changed depending on focus
 
-    sampler = neal.SimulatedAnnealingSampler()
+    sampler = get_sampler(neal.SimulatedAnnealingSampler)
 
     start = time.time()
 
@@ -497,7 +499,7 @@ def staff_schedule_quantum(n_employees, dataDir):
 
     bqm = 2*obj_func + const_1 + const_2 + const_3 + 3*const_4 + const_5 #here weights of constraints can be changed depending on focus
 
-    sampler = LeapHybridSampler(token='DEV-6428b06340440c170283af70c15c888faf277261')
+    sampler = get_sampler(LeapHybridSampler, token='DEV-6428b06340440c170283af70c15c888faf277261')
 
     start = time.time()
 
@@ -14,6 +14,8 @@ import time
 
 import neal
 
+from utilities import get_sampler
+
 import matplotlib.pyplot as plt
 
 dataDir = r'employees-scheduling/SCAD_TSA_simulated_data_final_v3.xlsx'
@@ -196,7 +198,7 @@ def staff_schedule(n_employees, dataDir):
 
     bqm = 2*obj_func + const_1 + const_2 + const_3 + 3*const_4 + const_5 #here weights of constraints can be changed depending on focus
 
-    sampler = LeapHybridSampler(token='DEV-5cb788ab47d1211cdddb54678e43ce43a12751b4')
+    sampler = get_sampler(LeapHybridSampler, token='DEV-5cb788ab47d1211cdddb54678e43ce43a12751b4')
 
     start = time.time()
 
@@ -11,6 +11,8 @@ from dwave.system import LeapHybridSampler
 from dimod import Binary, quicksum
 import pickle
 
+from utilities import get_sampler
+
 dataDir = r'C:\Users\scerto\Quantum\QuantumPython\SCAD_TSA'
 
 employeeDF = pd.read_excel(dataDir + r'\SCAD_TSA_simulated_data_final_v3.xlsx', sheet_name = 'Employee')
@@ -171,7 +173,7 @@ for n in employeeDF[employeeDF['wk_pref']==0]['empid'].unique():
     
     const_5 += wkend_tot
 
-sampler = LeapHybridSampler(token='eUXo-59c6b9bcf50e9d75f9550734efcc4143ac42c956')
+sampler = get_sampler(LeapHybridSampler, token='eUXo-59c6b9bcf50e9d75f9550734efcc4143ac42c956')
 
 
 bqm = 2*obj_func + const_1 + const_2 + const_3 + 3*const_4 + const_5
@@ -0,0 +1,177 @@
+"""Solves many what-if employee scheduling scenarios in one run.
+
+The scenario file is a JSON document such as:
+
+    {"num_shifts": 4,
+     "scenarios": [
+        {"name": "baseline",
+         "preferences": {"Anna": [1,2,3,4], "Bill": [3,2,1,4]}},
+        {"name": "Anna off, Bill not on shift 1",
+         "preferences": {"Anna": [1,2,3,4], "Bill": [3,2,1,4]},
+         "vacation": ["Anna"],
+         "restricted": {"Bill": [1]},
+         "restrictions": [["Anna", "Bill", "apart", 100]]}]}
+
+Employees on vacation are left out of the scenario and restricted shifts
+(numbered from 1) get the penalty preference. As in
+shift+restrictions_schedule.py, employees are spread over the shifts (SPREAD
+for every pair sharing a shift) and the pairwise restrictions (rows of
+restrictions.py, optional) couple the shifts of two employees. Scenarios
+with the same employees and restrictions share this quadratic structure,
+built once, and only differ in their linear biases.
+
+Usage:
+    python batch_schedule.py scenarios.json results.csv [--workers N]
+"""
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from dimod import DiscreteQuadraticModel
+
+from restrictions import restriction_table, shift_couplings
+from utilities import DQMDispatcher, LocalDQMSampler, get_sampler
+
+# Coupling between two employees on the same shift, spreading employees over the shifts
+SPREAD = 2
+
+def load_scenarios(filename):
+    '''Returns the number of shifts and the list of scenarios in a scenario file'''
+
+    with open(filename) as f:
+        data = json.load(f)
+
+    return data['num_shifts'], data['scenarios']
+
+def scenario_employees(scenario):
+    '''Returns the employees to schedule in a scenario'''
+
+    vacation = set(scenario.get('vacation', []))
+
+    return tuple(name for name in scenario['preferences'] if name not in vacation)
+
+def scenario_restrictions(scenario):
+    '''Returns the pairwise restriction rows of a scenario, as a hashable tuple'''
+
+    return tuple((a, b, relation, float(weight)) for a, b, relation, weight in scenario.get('restrictions', []))
+
+def build_structure(employees, num_shifts, restrictions=(), spread=SPREAD):
+    '''Returns the numpy vectors (case_starts, quadratic, labels) shared by the
+    scenarios scheduling the same employees with the same restrictions'''
+
+    n = len(employees)
+    case_starts = np.arange(n, dtype=np.int64) * num_shifts
+
+    # Net coupling of every pair of employees: the spread plus their restrictions
+    a, b = np.triu_indices(n, 1)
+    weight = np.full(len(a), float(spread))
+
+    ra, rb, rweight = restriction_table(restrictions, list(employees))
+    np.add.at(weight, (2 * n - ra - 1) * ra // 2 + rb - ra - 1, rweight)
+
+    keep = weight != 0
+    quadratic = shift_couplings(a[keep], b[keep], weight[keep], case_starts, num_shifts)
+
+    return case_starts, quadratic, list(employees)
+
+def scenario_biases(scenarios, employees, num_shifts, penalty):
+    '''Returns the linear biases of several scenarios as a (scenarios x cases) array'''
+
+    index = {name: i for i, name in enumerate(employees)}
+    biases = np.array([[scenario['preferences'][name] for name in employees] for scenario in scenarios], dtype=float)
+
+    for s, scenario in enumerate(scenarios):
+        for name, shifts in scenario.get('restricted', {}).items():
+            if name in index:
+                biases[s, index[name], np.asarray(shifts) - 1] = penalty
+
+    return biases.reshape(len(scenarios), len(employees) * num_shifts)
+
+def build_problems(num_shifts, scenarios, penalty=100):
+    '''Builds the DQM vectors of all the scenarios.
+
+    Scenarios are grouped by their employees and restrictions: the structure
+    of each group is built once and the linear biases of the whole group in
+    one array.
+
+    Returns:
+        List of (case_starts, linear, quadratic, labels), one per scenario
+    '''
+
+    groups = {}
+    for s, scenario in enumerate(scenarios):
+        groups.setdefault((scenario_employees(scenario), scenario_restrictions(scenario)), []).append(s)
+
+    problems = [None] * len(scenarios)
+    for (employees, restrictions), indices in groups.items():
+        case_starts, quadratic, labels = build_structure(employees, num_shifts, restrictions)
+        biases = scenario_biases([scenarios[s] for s in indices], employees, num_shifts, penalty)
+
+        for s, linear in zip(indices, biases):
+            problems[s] = (case_starts, linear, quadratic, labels)
+
+    return problems
+
+def solve_scenario(problem):
+    '''Solves one scenario on the local sampler and returns (sample, energy)'''
+
+    case_starts, linear, quadratic, labels = problem
+    dqm = DiscreteQuadraticModel.from_numpy_vectors(case_starts, linear, quadratic, labels)
+
+    sampler = get_sampler(DQMDispatcher, sampler_factory=LocalDQMSampler)
+    sampleset = sampler.sample_dqm(dqm)
+
+    return sampleset.first.sample, sampleset.first.energy
+
+def run_batch(num_shifts, scenarios, workers=None, penalty=100):
+    '''Solves all the scenarios with a pool of worker processes.
+
+    Returns:
+        pandas.DataFrame with one row per scheduled employee and columns
+        scenario, employee, shift (numbered from 1), preference and energy
+    '''
+
+    problems = build_problems(num_shifts, scenarios, penalty)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        solutions = list(executor.map(solve_scenario, problems, chunksize=max(1, len(problems) // 64)))
+
+    columns = {'scenario': [], 'employee': [], 'shift': [], 'preference': [], 'energy': []}
+    for scenario, (case_starts, linear, _, labels), (sample, energy) in zip(scenarios, problems, solutions):
+        for name, start in zip(labels, case_starts):
+            columns['scenario'].append(scenario['name'])
+            columns['employee'].append(name)
+            columns['shift'].append(int(sample[name]) + 1)
+            columns['preference'].append(linear[start + sample[name]])
+            columns['energy'].append(energy)
+
+    return pd.DataFrame(columns)
+
+def write_results(results, filename):
+    '''Writes the results table as Parquet (.parquet) or CSV (anything else)'''
+
+    if filename.endswith('.parquet'):
+        results.to_parquet(filename, index=False)
+    else:
+        results.to_csv(filename, index=False)
+
+## ------- Main program -------
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Solve a batch of employee scheduling scenarios')
+    parser.add_argument('scenarios', help='JSON scenario file')
+    parser.add_argument('results', help='output table (.csv or .parquet)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--penalty', type=float, default=100, help='preference given to restricted shifts')
+    args = parser.parse_args()
+
+    num_shifts, scenarios = load_scenarios(args.scenarios)
+
+    results = run_batch(num_shifts, scenarios, args.workers, args.penalty)
+
+    write_results(results, args.results)
+
+    print("Solved", len(scenarios), "scenarios, results saved to", args.results)
@@ -0,0 +1,118 @@
+"""Pairwise employee restrictions for the shift scheduling DQMs.
+
+A restriction is a row (employee_a, employee_b, relation, weight) where
+relation is 'apart' (the two employees should not share a shift) or
+'together' (they would like to work the same shift). Each row becomes the
+diagonal block of the shift-by-shift coupling between the two employees:
++weight for 'apart' and -weight for 'together' on every (shift i, shift i).
+"""
+
+import csv
+
+import numpy as np
+from dimod import DiscreteQuadraticModel
+
+# Sign of the shift coupling for each relation
+RELATIONS = {'apart': 1, 'together': -1}
+
+def load_restrictions(filename):
+    '''Returns the rows of a CSV file with columns employee_a, employee_b, relation, weight'''
+
+    with open(filename, newline='') as f:
+        return [(row['employee_a'], row['employee_b'], row['relation'], float(row['weight']))
+                for row in csv.DictReader(f)]
+
+def restriction_table(rows, employees):
+    """Converts restriction rows to arrays of employee indices and net weights.
+
+    Rows are deduplicated (the largest weight is kept for repeated rules on the
+    same pair and relation) and conflicting rules on the same pair are merged
+    into one signed weight. Rows naming an employee that is not in employees
+    (for example someone on vacation) and rows pairing an employee with
+    themselves are dropped.
+
+    Args:
+        rows (iterable): (employee_a, employee_b, relation, weight) rows
+        employees (list): Employee labels, in variable order
+
+    Returns:
+        Tuple (a, b, weight) of arrays with a < b; weight is positive for
+        employees kept apart and negative for employees kept together
+    """
+    index = {name: i for i, name in enumerate(employees)}
+    rows = [row for row in rows if row[0] in index and row[1] in index]
+
+    for row in rows:
+        if row[2] not in RELATIONS:
+            raise ValueError("unknown relation {!r}, expected one of {}".format(row[2], sorted(RELATIONS)))
+
+    a = np.array([index[row[0]] for row in rows], dtype=np.int64)
+    b = np.array([index[row[1]] for row in rows], dtype=np.int64)
+    sign = np.array([RELATIONS[row[2]] for row in rows], dtype=np.int64)
+    weight = np.array([row[3] for row in rows], dtype=float)
+
+    keep = a != b
+    lo, hi = np.minimum(a, b)[keep], np.maximum(a, b)[keep]
+    sign, weight = sign[keep], weight[keep]
+
+    # Deduplicate: one weight per (pair, relation), the largest one
+    n = max(len(employees), 1)
+    rules, inverse = np.unique((lo * n + hi) * 2 + (sign > 0), return_inverse=True)
+    rule_weight = np.full(len(rules), -np.inf)
+    np.maximum.at(rule_weight, inverse, weight)
+
+    # Merge: 'apart' and 'together' rules on the same pair add up
+    pairs, inverse = np.unique(rules // 2, return_inverse=True)
+    net = np.bincount(inverse, np.where(rules % 2, rule_weight, -rule_weight), len(pairs))
+
+    keep = net != 0
+
+    return pairs[keep] // n, pairs[keep] % n, net[keep]
+
+def shift_couplings(a, b, weight, case_starts, num_shifts):
+    """Returns the diagonal shift-coupling blocks of several employee pairs.
+
+    Args:
+        a, b (array): Variable indices of the employees of each pair
+        weight (array or float): Coupling of each pair
+        case_starts (array): First case index of each variable of the DQM
+        num_shifts (int): Number of shifts (cases per employee)
+
+    Returns:
+        Tuple (irow, icol, biases) in the format of DiscreteQuadraticModel.from_numpy_vectors
+    """
+    case_starts = np.asarray(case_starts, dtype=np.int64)
+    shifts = np.arange(num_shifts)
+
+    irow = (case_starts[a][:, np.newaxis] + shifts).ravel()
+    icol = (case_starts[b][:, np.newaxis] + shifts).ravel()
+    biases = np.repeat(np.broadcast_to(np.asarray(weight, dtype=float), np.shape(a)), num_shifts)
+
+    return irow, icol, biases
+
+def add_shift_couplings(dqm, a, b, weight, num_shifts):
+    """Returns a copy of dqm with the diagonal shift-coupling blocks of the pairs added.
+
+    Couplings are added to any quadratic bias already present between the cases.
+    """
+    case_starts, linear, (irow, icol, qdata), labels, offset = dqm.to_numpy_vectors(return_offset=True)
+
+    new_irow, new_icol, new_biases = shift_couplings(a, b, weight, case_starts, num_shifts)
+    quadratic = (np.concatenate((irow, new_irow)), np.concatenate((icol, new_icol)), np.concatenate((qdata, new_biases)))
+
+    return DiscreteQuadraticModel.from_numpy_vectors(case_starts, linear, quadratic, labels, offset=offset)
+
+def add_restrictions(dqm, rows, num_shifts):
+    """Returns a copy of dqm with the pairwise restrictions in rows added.
+
+    Args:
+        dqm (DiscreteQuadraticModel): Shift DQM with one variable per employee
+        rows (iterable): (employee_a, employee_b, relation, weight) rows
+        num_shifts (int): Number of shifts
+
+    Returns:
+        DiscreteQuadraticModel
+    """
+    a, b, weight = restriction_table(rows, list(dqm.variables))
+
+    return add_shift_couplings(dqm, a, b, weight, num_shifts)
@@ -14,12 +14,16 @@
 
 from dimod import DiscreteQuadraticModel
 from dwave.system import LeapHybridDQMSampler
+from utilities import DQMDispatcher, get_sampler
+from restrictions import add_restrictions, add_shift_couplings
+import numpy as np
 
 # Set the solver we're going to use
 def set_sampler():
-    '''Returns a dimod sampler'''
+    '''Returns a dimod sampler: small problems are solved exactly in-process,
+    the others on LeapHybridDQMSampler'''
 
-    sampler = LeapHybridDQMSampler()
+    sampler = get_sampler(DQMDispatcher, sampler_factory=LeapHybridDQMSampler)
 
     return sampler
 
@@ -38,6 +42,15 @@ def employee_preferences():
 
     return preferences
 
+# Set pairwise restrictions between employees
+def employee_restrictions():
+    '''Returns the restrictions as (employee_a, employee_b, relation, weight) rows'''
+
+    restrictions = [("Bill", "Frank", "apart", 100),        #Bill and Frank cannot work during the same shift
+                    ("Erica", "Harriet", "together", 100)]  #Erica and Harriet would like to work the same shift.
+
+    return restrictions
+
 # Create DQM object
 def build_dqm():
     '''Builds the DQM for our problem'''
@@ -57,17 +70,16 @@ def build_dqm():
         dqm.set_linear(name, preferences[name])
 
     # Set some quadratic biases to reflect the restrictions
-    for i in range(num_shifts):
-        dqm.set_quadratic_case("Bill", i, "Frank", i, 100)  #Bill and Frank cannot work during the same shift
-        dqm.set_quadratic_case("Erica", i, "Harriet", i, -100) #Erica and Harriet would like to work the same shift.
+    dqm = add_restrictions(dqm, employee_restrictions(), num_shifts)
 
     people = list(preferences.keys())
 
-    for i in range(num_shifts):
-        for j in range(len(people)):
-            dqm.set_linear_case(people[j], i, dqm.get_linear_case(people[j], i)-3)
-            for z in range(j+1, len(people)):
-                dqm.set_quadratic_case(people[j], i, people[z], i, dqm.get_quadratic_case(people[j], i, people[z], i)+2)
+    # Spread employees over the shifts: -3 on every shift and +2 for every pair of employees sharing a shift
+    for name in people:
+        dqm.set_linear(name, dqm.get_linear(name) - 3)
+
+    j, z = np.triu_indices(len(people), 1)
+    dqm = add_shift_couplings(dqm, j, z, 2, num_shifts)
     
     return dqm
 
@@ -75,9 +87,6 @@ def build_dqm():
 def solve_problem(dqm, sampler):
     '''Runs the provided dqm object on the designated sampler'''
 
-    # Initialize the DQM solver
-    sampler = set_sampler()
-
     # Solve the problem using the DQM solver
     sampleset = sampler.sample_dqm(dqm, label='Training - Employee Scheduling')
 
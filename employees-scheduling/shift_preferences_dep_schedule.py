@@ -1,12 +1,23 @@
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 from dimod import DiscreteQuadraticModel
 from dwave.system import LeapHybridDQMSampler, LeapHybridCQMSampler
 from dimod import ConstrainedQuadraticModel, Binary
+from utilities import DQMDispatcher, get_sampler
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler
 
 # Set the solver we're going to use
 def set_sampler():
-    '''Returns a dimod sampler'''
+    '''Returns a dimod sampler: small problems are solved exactly in-process,
+    the others on LeapHybridDQMSampler'''
 
-    sampler = LeapHybridDQMSampler()
+    sampler = get_sampler(DQMDispatcher, sampler_factory=LeapHybridDQMSampler)
 
     return sampler
 
@@ -111,9 +122,6 @@ def build_dqm(preferences, num_pref):
 def solve_problem(dqm, sampler):
     '''Runs the provided dqm object on the designated sampler'''
 
-    # Initialize the DQM solver
-    sampler = set_sampler()
-
     # Solve the problem using the DQM solver
     sampleset = sampler.sample_dqm(dqm, label='Training - Employee Scheduling')
 
@@ -134,6 +142,69 @@ def process_sampleset(sampleset, num_pref):
 
     return shift_schedule
 
+# Samplesets of the problems solved so far, keyed by problem content
+solved_problems = {}
+
+def problem_key(dqm):
+    '''Returns a key identifying the content (labels, cases and biases) of a DQM'''
+
+    case_starts, linear, (irow, icol, qdata), labels, offset = dqm.to_numpy_vectors(return_offset=True)
+
+    key = hashlib.sha1(repr(list(labels)).encode())
+    for vector in (case_starts, linear, irow, icol, qdata):
+        key.update(vector.tobytes())
+    key.update(repr(float(offset)).encode())
+
+    return key.hexdigest()
+
+def department_preferences(preferences, employees):
+    '''Returns the shift preferences of the employees assigned to a department'''
+
+    return {name: preferences[name] for name in employees}
+
+def solve_departments(dep_schedule, preferences, num_pref, sampler):
+    '''Solves the shift problem of every department.
+
+    Each department's DQM is built only from the employees assigned to it.
+    Departments are solved concurrently, identical problems are solved once
+    and problems already in solved_problems are not sent to the sampler again.
+
+    Args:
+        dep_schedule (list): Employees assigned to each department
+        preferences (dict): Shift preferences of all employees
+        num_pref (int): Number of shifts
+        sampler (dimod.Sampler): Sampler used for the shift problems
+
+    Returns:
+        List with the shift schedule of each department
+    '''
+
+    dqms = [build_dqm(department_preferences(preferences, employees), num_pref) if employees else None
+            for employees in dep_schedule]
+    keys = [problem_key(dqm) if dqm is not None else None for dqm in dqms]
+
+    # Only submit problems that have not been solved yet, each one once
+    pending = {}
+    for key, dqm in zip(keys, dqms):
+        if key is not None and key not in solved_problems:
+            pending[key] = dqm
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {key: executor.submit(solve_problem, dqm, sampler) for key, dqm in pending.items()}
+
+        for key, future in futures.items():
+            solved_problems[key] = future.result()
+
+    shift_schedules = []
+    for key in keys:
+        if key is None:
+            shift_schedules.append([ [] for i in range(num_pref)])
+        else:
+            shift_schedules.append(process_sampleset(solved_problems[key], num_pref))
+
+    return shift_schedules
+
 # DEPARTMENT PREFERENCES    
 
 def define_cqm(dqm_1, dqm_2):
@@ -144,9 +215,10 @@ def define_cqm(dqm_1, dqm_2):
 
     return cqm
 
-def sample_cqm(cqm):
+def sample_cqm(cqm, local=False):
+    '''Samples the CQM on LeapHybridCQMSampler, or on LocalCQMSampler when local is True'''
 
-    sampler = LeapHybridCQMSampler()
+    sampler = get_sampler(LocalCQMSampler if local else LeapHybridCQMSampler)
     sampleset_cqm = sampler.sample_cqm(cqm, time_limit=5, label = 'CQM problem')
 
 
@@ -217,24 +289,14 @@ if __name__ == "__main__":
 
     dep_schedule = process_sampleset(sampleset_dep, num_dep)
 
-    preferences = {}
+    # dqm shift preferences, one per department with its own employees only
+    shift_schedules = solve_departments(dep_schedule, preferences_shift, num_shifts, sampler_dep)
 
     for j in range(num_dep):
-        # for name in dep_schedule[j]:
-        #     preferences[name] = preferences_shift[name]
-        
-        dqm_shift = build_dqm(preferences_shift, num_shifts)
-
-        sampler_shift = set_sampler()
-
-        sampleset_shift = solve_problem(dqm_shift, sampler_shift)
-
-        shift_schedule = process_sampleset(sampleset_shift, num_shifts)
-
         print("Department:", departments[j], "\tEmployee(s): ", dep_schedule[j])
         
         for i in range(num_shifts):
-            print("Shift:", shifts[i], "\tEmployee(s): ", shift_schedule[i])
+            print("Shift:", shifts[i], "\tEmployee(s): ", shift_schedules[j][i])
 
 
     # combine preferences
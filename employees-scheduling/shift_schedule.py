@@ -14,6 +14,7 @@
 
 from dimod import DiscreteQuadraticModel
 from dwave.system import LeapHybridDQMSampler
+from utilities import DQMDispatcher, get_sampler
 
 def get_token():
     '''Returns personal access token. Only required if submitting to autograder.'''
@@ -21,9 +22,10 @@ def get_token():
 
 # Set the solver we're going to use
 def set_sampler():
-    '''Returns a dimod sampler'''
+    '''Returns a dimod sampler: small problems are solved exactly in-process,
+    the others on LeapHybridDQMSampler'''
 
-    sampler = LeapHybridDQMSampler()
+    sampler = get_sampler(DQMDispatcher, sampler_factory=LeapHybridDQMSampler)
 
     return sampler
 
@@ -66,9 +68,6 @@ def build_dqm():
 def solve_problem(dqm, sampler):
     '''Runs the provided dqm object on the designated sampler'''
 
-    # Initialize the DQM solver
-    sampler = set_sampler()
-
     # Solve the problem using the DQM solver
     sampleset = sampler.sample_dqm(dqm, label='Training - Employee Scheduling')
 
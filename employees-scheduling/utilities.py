@@ -0,0 +1,243 @@
+import threading
+
+import numpy as np
+import dimod
+from scipy import sparse
+
+class SamplerSession:
+    """Keeps a single instance of each sampler used in the process.
+
+    Samplers are built on first request and shared by every later solve, so
+    loops over departments or scheduling instances do not pay the client
+    setup cost again. Their properties are read once and cached too. This
+    works the same for hybrid and local samplers.
+    """
+
+    def __init__(self):
+        self._samplers = {}
+        self._properties = {}
+        self._lock = threading.Lock()
+
+    def get(self, factory, **kwargs):
+        """Returns the instance built by factory(**kwargs), building it on first use.
+
+        Args:
+            factory (callable): Sampler class or function returning a sampler
+            **kwargs: Hashable keyword arguments passed to factory
+
+        Returns:
+            The shared sampler
+        """
+        key = (factory, tuple(sorted(kwargs.items())))
+
+        with self._lock:
+            if key not in self._samplers:
+                self._samplers[key] = factory(**kwargs)
+
+            return self._samplers[key]
+
+    def properties(self, sampler):
+        """Returns the properties of a sampler, read on first request.
+
+        Samplers without properties give an empty dict. The cache entry is
+        refreshed when the sampler is connected to another solver (its
+        solver attribute changes), as the properties describe the solver.
+        """
+        solver = getattr(sampler, 'solver', None)
+
+        with self._lock:
+            cached = self._properties.get(id(sampler))
+            if cached is None or cached[0] is not sampler or cached[1] is not solver:
+                cached = (sampler, solver, dict(getattr(sampler, 'properties', {})))
+                self._properties[id(sampler)] = cached
+
+            return cached[2]
+
+# Sampler session shared by all the scheduling scripts
+session = SamplerSession()
+
+def get_sampler(factory, **kwargs):
+    """Returns the process-wide instance of a sampler, see SamplerSession.get"""
+
+    return session.get(factory, **kwargs)
+
+def get_properties(sampler):
+    """Returns the cached properties of a sampler, see SamplerSession.properties"""
+
+    return session.properties(sampler)
+
+def dqm_vectors(dqm):
+    """Returns the numpy representation of a DQM.
+
+    Args:
+        dqm (DiscreteQuadraticModel): The DQM to convert
+
+    Returns:
+        Tuple (num_cases, case_starts, linear, (irow, icol, qdata), labels, offset)
+        where num_cases[v] is the number of cases of the v-th variable
+    """
+    case_starts, linear, (irow, icol, qdata), labels, offset = dqm.to_numpy_vectors(return_offset=True)
+
+    case_starts = np.asarray(case_starts, dtype=np.int64)
+    num_cases = np.diff(np.append(case_starts, len(linear)))
+
+    return num_cases, case_starts, linear, (irow, icol, qdata), labels, offset
+
+def num_states(dqm):
+    """Returns the number of possible assignments of a DQM"""
+
+    num_cases = dqm_vectors(dqm)[0]
+
+    return int(np.prod(num_cases, dtype=object))
+
+def solve_decoupled(dqm):
+    """Solves a DQM without interactions exactly by taking the argmin of each variable.
+
+    Args:
+        dqm (DiscreteQuadraticModel): A DQM with linear biases only
+
+    Returns:
+        dimod.SampleSet with the optimal sample
+    """
+    num_cases, case_starts, linear, _, labels, offset = dqm_vectors(dqm)
+
+    # Pad the linear biases into a (variables x cases) table
+    var_of = np.repeat(np.arange(len(num_cases)), num_cases)
+    table = np.full((len(num_cases), num_cases.max(initial=1)), np.inf)
+    table[var_of, np.arange(len(linear)) - case_starts[var_of]] = linear
+
+    sample = table.argmin(axis=1)
+    energy = table[np.arange(len(num_cases)), sample].sum() + offset
+
+    return dimod.SampleSet.from_samples((sample[np.newaxis, :], list(labels)), 'DISCRETE', [energy])
+
+def solve_exhaustive(dqm, num_reads=10, block_size=2**12):
+    """Solves a DQM exactly by enumerating all its possible assignments.
+
+    Args:
+        dqm (DiscreteQuadraticModel): The DQM to solve
+        num_reads (int): Number of lowest-energy samples to return
+        block_size (int): Number of assignments evaluated at a time
+
+    Returns:
+        dimod.SampleSet with the num_reads lowest-energy samples
+    """
+    num_cases, case_starts, linear, (irow, icol, qdata), labels, offset = dqm_vectors(dqm)
+
+    # Variable and case of every row/column of the quadratic biases
+    var_of = np.repeat(np.arange(len(num_cases)), num_cases)
+    row_var, row_case = var_of[irow], irow - case_starts[var_of[irow]]
+    col_var, col_case = var_of[icol], icol - case_starts[var_of[icol]]
+
+    total = int(np.prod(num_cases))
+    best_samples = np.empty((0, len(num_cases)), dtype=np.int64)
+    best_energies = np.empty(0)
+
+    for start in range(0, total, block_size):
+        index = np.arange(start, min(start + block_size, total))
+        samples = np.stack(np.unravel_index(index, num_cases), axis=1)
+
+        energies = linear[samples + case_starts].sum(axis=1) + offset
+        active = (samples[:, row_var] == row_case) & (samples[:, col_var] == col_case)
+        energies += active @ qdata
+
+        # Keep only the num_reads best assignments seen so far
+        best_samples = np.concatenate((best_samples, samples))
+        best_energies = np.concatenate((best_energies, energies))
+        keep = np.argsort(best_energies, kind='stable')[:num_reads]
+        best_samples, best_energies = best_samples[keep], best_energies[keep]
+
+    return dimod.SampleSet.from_samples((best_samples, list(labels)), 'DISCRETE', best_energies)
+
+class DQMDispatcher:
+    """Solves easy DQMs exactly in-process and sends the others to a heavy sampler.
+
+    DQMs without interactions are solved by a per-variable argmin and DQMs with
+    at most max_states possible assignments by exhaustive enumeration. All
+    other DQMs go to the shared instance of sampler_factory, which is only
+    built the first time a hard DQM is found.
+
+    Args:
+        sampler_factory (callable): Returns the sampler used for hard DQMs
+        max_states (int): Largest number of assignments solved by enumeration
+    """
+
+    def __init__(self, sampler_factory, max_states=2**16):
+        self.sampler_factory = sampler_factory
+        self.max_states = max_states
+
+    @property
+    def sampler(self):
+        """The heavy sampler, built on first use"""
+
+        return get_sampler(self.sampler_factory)
+
+    @property
+    def parameters(self):
+        return {'num_reads': [], 'label': []}
+
+    @property
+    def properties(self):
+        """max_states and the cached properties of the heavy sampler (which builds it)"""
+
+        return {'max_states': self.max_states, 'sampler_properties': get_properties(self.sampler)}
+
+    def sample_dqm(self, dqm, **kwargs):
+        """Returns a dimod.SampleSet for the DQM.
+
+        Keyword arguments are passed on to the heavy sampler; num_reads is also
+        used by the exhaustive solver.
+        """
+        if dqm.num_variable_interactions() == 0:
+            return solve_decoupled(dqm)
+
+        if num_states(dqm) <= self.max_states:
+            return solve_exhaustive(dqm, num_reads=kwargs.get('num_reads', 10))
+
+        return self.sampler.sample_dqm(dqm, **kwargs)
+
+class LocalDQMSampler:
+    """Local stand-in for LeapHybridDQMSampler based on simulated annealing.
+
+    Every read keeps one case per variable; a sweep redraws the case of each
+    variable from its Boltzmann distribution given the other variables (heat
+    bath), for all reads at once, while beta follows a geometric schedule.
+    """
+
+    def __init__(self):
+        self.properties = {}
+        self.parameters = {'num_reads': [], 'num_sweeps': [], 'beta_range': [], 'seed': []}
+
+    def sample_dqm(self, dqm, num_reads=10, num_sweeps=200, beta_range=None, seed=None, label=None):
+        """Returns a dimod.SampleSet for the DQM; label is accepted for compatibility"""
+
+        num_cases, case_starts, linear, (irow, icol, qdata), labels, _ = dqm_vectors(dqm)
+        rng = np.random.default_rng(seed)
+
+        # Symmetric case-by-case coupling matrix
+        Q = sparse.coo_matrix((np.concatenate((qdata, qdata)), (np.concatenate((irow, icol)), np.concatenate((icol, irow)))),
+                              shape=(len(linear), len(linear))).tocsr()
+
+        # Hot enough to accept the largest energy change half of the time, cold enough to freeze
+        if beta_range is None:
+            coupling = np.bincount(irow, np.abs(qdata), len(linear)) + np.bincount(icol, np.abs(qdata), len(linear))
+            spread = max(np.abs(linear).max(initial=0) + coupling.max(initial=0), 1e-9)
+            beta_range = (np.log(2) / spread, 100 * np.log(100) / spread)
+        betas = np.geomspace(beta_range[0], beta_range[1], num_sweeps)
+
+        samples = (rng.random((num_reads, len(num_cases))) * num_cases).astype(np.int64)
+        onehot = np.zeros((len(linear), num_reads))
+        onehot[samples + case_starts, np.arange(num_reads)[:, np.newaxis]] = 1
+
+        for beta in betas:
+            for v, (start, k) in enumerate(zip(case_starts, num_cases)):
+                field = linear[start:start+k, np.newaxis] + Q[start:start+k] @ onehot
+                weights = np.exp(-beta * (field - field.min(axis=0)))
+                cases = (weights.cumsum(axis=0) / weights.sum(axis=0) < rng.random(num_reads)).sum(axis=0)
+                cases = np.minimum(cases, k - 1)
+
+                onehot[start:start+k] = 0
+                onehot[start + cases, np.arange(num_reads)] = 1
+                samples[:, v] = cases
+
+        return dimod.SampleSet.from_samples((samples, list(labels)), 'DISCRETE', dqm.energies((samples, labels)))
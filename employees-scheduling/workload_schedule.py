@@ -1,114 +1,176 @@
+import argparse
+import os
+import sys
+
+import numpy as np
 import utilities
-from dimod import ConstrainedQuadraticModel, Binary
+from dimod import ConstrainedQuadraticModel, BinaryQuadraticModel
 from dwave.system import LeapHybridCQMSampler
 
-    
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler, presolve_and_sample
+
+# Quadratic vectors of a model without interactions
+NO_INTERACTIONS = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+
 def employee_preferences():
-    '''Returns a list of variables named 's_{ppl}' for each employee ppl in prefernces, where ppl is replaced by the employee name'''
+    '''Returns a dictionary of employees with their preferences on shifts'''
 
     preferences = { "Anna": [1,2,3,1,1,3,1,2,100], #Restrict Anna from working shift 9
                     "Bill": [3,3,1,2,2,2,3,1,2],
-                    "Chris": [3,3,2,2,100,1,3,2,3], #Restrict Bill from working shift 5
+                    "Chris": [3,3,2,2,100,1,3,2,3], #Restrict Chris from working shift 5
                     "Diane": [1,1,3,3,2,1,3,3,3],
                     "Erica": [3,2,2,3,1,2,2,3,2],
                     "Frank": [3,100,1,3,3,3,2,1,1], #Restrict Frank from working shift 2
                     "George": [1,100,2,2,3,2,3,2,1],  #Restrict George from working shift 2
                     "Harriet": [3,1,2,1,2,2,3,3,1],
-                    "Martin": [1,3,1,1,2,1,1,2,3]} 
+                    "Martin": [1,3,1,1,2,1,1,2,3]}
+
+    return preferences
+
+def employee_capacities():
+    '''Returns a dictionary of employees with the maximum number of hours they can work'''
+
+    capacities = { "Anna": 24,
+                   "Bill": 32,
+                   "Chris": 24,
+                   "Diane": 40,
+                   "Erica": 16,
+                   "Frank": 32,
+                   "George": 24,
+                   "Harriet": 40,
+                   "Martin": 16}
+
+    return capacities
+
+def shift_requirements():
+    '''Returns the length in hours and the workload in person-hours of each shift'''
+
+    hours = [8, 8, 8, 8, 8, 8, 8, 8, 8]
+    workload = [16, 24, 16, 24, 16, 24, 16, 24, 16]
+
+    return hours, workload
+
+def define_variables(employees, num_shifts):
+    """Define the variables to be used for the CQM.
+    Args:
+        employees (list): List of employee names
+        num_shifts (int): Number of shifts
+
+    Returns:
+        labels (2D numpy array):
+            Entry [i][j] is the label 'x_{name}_{shift}' of the binary variable
+            that assigns employee i to shift j (shifts numbered from 1)
+    """
+    labels = np.array([[f'x_{name}_{shift}' for shift in range(1, num_shifts + 1)] for name in employees], dtype=object)
 
-    employees = [Binary(f's_{ppl}') for ppl in list(preferences.keys())]
+    return labels
 
-    return employees
+def linear_model(biases, labels):
+    '''Returns a BinaryQuadraticModel with the given linear biases and no interactions'''
 
-def define_cqm(employees, num_hours_to_allocate, price, returns, budget, variance):
-    """Define a CQM for the exercise. 
+    return BinaryQuadraticModel.from_numpy_vectors(np.asarray(biases, dtype=float), NO_INTERACTIONS, 0, 'BINARY',
+                                                   variable_order=labels)
+
+def define_cqm(labels, employees, preferences, capacity, hours, workload):
+    """Define a CQM for the workload scheduling problem.
     Requirements:
-        Objectives: 
-            - Maximize returns
-            - Minimize variance
+        Objective: Minimize the preference cost of the assignments
         Constraints:
-            - Choose exactly num_stocks_to_buy stocks
-            - Spend at most budget on purchase
-            
+            - Each shift gets at least its workload in person-hours
+            - Each employee works at most their capacity in hours
+
     Args:
-        stocks (list):
-            List of variables named 's_{stk}' for each stock in stockcodes
-        num_stocks_to_buy (int): Number of stocks to purchase
-        price (list):
-            List of current price for each stock in stocks
-                where price[i] is the price for stocks[i]
-        returns (list):
-            List of average monthly returns for each stock in stocks
-                where returns[i] is the average returns for stocks[i]
-        budget (float):
-            Budget for purchase
-        variance (2D numpy array):
-            Entry [i][j] is the variance between stocks i and j
-        
+        labels (2D numpy array):
+            Variable labels as returned by define_variables
+        employees (list): List of employee names, in the order of the rows of labels
+        preferences (2D numpy array):
+            Entry [i][j] is the cost of assigning employee i to shift j
+        capacity (list):
+            Maximum number of hours of each employee
+        hours (list):
+            Length in hours of each shift
+        workload (list):
+            Required person-hours of each shift
+
     Returns:
         cqm (ConstrainedQuadraticModel)
     """
+    hours = np.asarray(hours, dtype=float)
+    num_employees, num_shifts = labels.shape
 
-    # TODO: Initialize the ConstrainedQuadraticModel called cqm
-    ## Hint: Remember to import the required package at the top of the file for ConstrainedQuadraticModels
     cqm = ConstrainedQuadraticModel()
 
-    # TODO: Add a constraint to choose exactly num_stocks_to_buy stocks
-    ## Important: Use the label 'choose k stocks'
-    cqm.add_constraint(sum(hours[i]*employees[i]) for i in range(len(employees))) >= workload, label='workload' )  
-    cqm.set_objective(sum(-returns[i]+stocks[i] for i in range(len(stocks))))
-
-    # TODO: Add a constraint that the cost of the purchased stocks is less than or equal to the budget
-    ## Important: Use the label 'budget_limitation'
-    cqm.add_constraint(sum(stocks[i]*price[i] for i in range(len(stocks))) <= budget, label='budget_limitation')
+    # Objective: sum of preferences[i][j]*x[i][j], built from the flattened arrays in one go
+    cqm.set_objective(linear_model(np.asarray(preferences, dtype=float).ravel(), labels.ravel()))
 
-    # TODO: Add an objective function maximize returns AND minimize variance
-    ## Hint: Determine each objective separately then add them together
-    ## Hint: Variance is computed as a quadratic term: variance[i][j]*stock[i]*stock[j]
-    
+    # Workload of each shift: sum over employees of hours[j]*x[i][j] >= workload[j]
+    for j in range(num_shifts):
+        cqm.add_constraint_from_model(linear_model(np.full(num_employees, hours[j]), labels[:, j]),
+                                      '>=', workload[j], label=f'workload_shift_{j+1}', copy=False)
 
-    ob_1 = sum(-returns[i]+stocks[i] for i in range(len(stocks)))
-    ob_2 = sum(variance[i][j]*stocks[i]*stocks[j] for i in range(len(stocks)) for j in range(i+1, len(stocks)))
+    # Capacity of each employee: sum over shifts of hours[j]*x[i][j] <= capacity[i]
+    for i in range(num_employees):
+        cqm.add_constraint_from_model(linear_model(hours, labels[i]),
+                                      '<=', capacity[i], label=f'capacity_{employees[i]}', copy=False)
 
-    cqm.set_objective(ob_1 + ob_2)
-    
     return cqm
 
-def sample_cqm(cqm):
+def sample_cqm(cqm, local=False):
+    '''Presolves the CQM and samples the reduced model on LeapHybridCQMSampler, or on LocalCQMSampler when local is True'''
 
-    # TODO: Define your sampler as LeapHybridCQMSampler
-    ## Hint: Remember to import the required package at the top of the file
-    
+    sampler = utilities.get_sampler(LocalCQMSampler if local else LeapHybridCQMSampler)
+    sampleset = presolve_and_sample(sampler, cqm, time_limit=5, label = 'CQM problem')
 
-    # TODO: Sample the ConstrainedQuadraticModel cqm and store the result in sampleset
-    sampler = LeapHybridCQMSampler()
-    sampleset = sampler.sample_cqm(cqm, time_limit=5, label = 'CQM problem')
+    return sampleset
 
+def process_sampleset(sampleset, labels, employees):
+    '''Returns the employees scheduled on each shift in the best feasible solution'''
 
-    return sampleset
+    feasible = sampleset.filter(lambda d: d.is_feasible)
 
-if __name__ == '__main__':
+    if not len(feasible):
+        print("\nNo feasible solution found.\n")
+        return None
 
-    # 10 stocks used in this program
-    stockcodes = ["T", "SFL", "PFE", "XOM", "MO", "VZ", "IBM", "TSLA", "GILD", "GE"]
+    sample = feasible.first.sample
 
-    price, returns, variance = utilities.get_stock_info()
+    shift_schedule = [ [] for j in range(labels.shape[1])]
 
-    # Number of stocks to select
-    num_stocks_to_buy = 2
+    for i, name in enumerate(employees):
+        for j in range(labels.shape[1]):
+            if sample[labels[i, j]]:
+                shift_schedule[j].append(name)
 
-    # Set the budget
-    budget = 40
+    return shift_schedule
 
-    # Add binary variables for stocks
-    stocks = define_variables(stockcodes)
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--local', action='store_true', help='solve on the local CQM sampler instead of Leap')
+    args = parser.parse_args()
+
+    preferences = employee_preferences()
+    capacities = employee_capacities()
+    hours, workload = shift_requirements()
+
+    employees = list(preferences.keys())
+    num_shifts = len(hours)
+
+    # Add binary variables for employee/shift assignments
+    labels = define_variables(employees, num_shifts)
 
     # Build CQM
-    cqm = define_cqm(stocks, num_stocks_to_buy, price, returns, budget, variance)
+    cqm = define_cqm(labels, employees, np.array([preferences[name] for name in employees]),
+                     [capacities[name] for name in employees], hours, workload)
 
     # Run CQM on hybrid solver
-    sampleset = sample_cqm(cqm)
-    
+    sampleset = sample_cqm(cqm, args.local)
+
     # Process and print solution
-    print("\nPart 3 solution:\n")
-    utilities.process_sampleset(sampleset, stockcodes)
\ No newline at end of file
+    shift_schedule = process_sampleset(sampleset, labels, employees)
+
+    if shift_schedule is not None:
+        for j in range(num_shifts):
+            print("Shift:", j+1, "\tEmployee(s): ", shift_schedule[j])
@@ -0,0 +1,8 @@
+"""Local solvers shared by the training scripts, usable without a Leap connection."""
+
+from local_solvers.cqm import LocalCQMSampler
+from local_solvers.presolve import Presolver, presolve_and_sample
+from local_solvers.decomposition import ComponentSampler, split_components
+from local_solvers.annealing import LocalIsingSampler
+from local_solvers.exact import GrayCodeSolver
+from local_solvers.embedding import CachedEmbeddingComposite, EmbeddingCache
@@ -0,0 +1,196 @@
+"""Local stand-in for the QPU samplers: vectorized simulated annealing and parallel tempering."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dimod
+import numpy as np
+from scipy import sparse
+
+METHODS = ('annealing', 'tempering')
+
+def ising_arrays(bqm):
+    """Returns the Ising form of a BQM as arrays.
+
+    Returns:
+        Tuple (variables, h, J, offset): the variable labels, the linear
+        biases, the symmetric (variables x variables) CSR coupling matrix and
+        the offset of the spin-valued model
+    """
+    variables = list(bqm.variables)
+    h, (irow, icol, qdata), offset = bqm.spin.to_numpy_vectors(variable_order=variables)
+
+    n = len(variables)
+    J = sparse.coo_matrix((np.concatenate((qdata, qdata)), (np.concatenate((irow, icol)), np.concatenate((icol, irow)))),
+                          shape=(n, n)).tocsr()
+
+    return variables, np.asarray(h, dtype=float), J, offset
+
+def color_classes(J):
+    """Splits the variables into independent sets by greedy coloring (largest degree first).
+
+    Variables of one class share no coupling, so they can all be updated at once.
+    """
+    n = J.shape[0]
+    degree = np.diff(J.indptr)
+    color = np.full(n, -1, dtype=np.int64)
+
+    for v in np.argsort(-degree, kind='stable'):
+        neighbours = color[J.indices[J.indptr[v]:J.indptr[v+1]]]
+        used = np.zeros(len(neighbours) + 1, dtype=bool)
+        used[neighbours[(neighbours >= 0) & (neighbours <= len(neighbours))]] = True
+        color[v] = np.argmin(used)
+
+    return [np.flatnonzero(color == c) for c in range(color.max() + 1)]
+
+def default_beta_range(h, J):
+    '''Returns inverse temperatures where the largest flip is accepted half the time and the smallest 1% of the time'''
+
+    largest = 2 * (np.abs(h) + abs(J).sum(axis=1).A1).max(initial=0)
+    biases = np.concatenate((np.abs(h), np.abs(J.data)))
+    smallest = 2 * biases[biases > 0].min(initial=largest / 2 if largest else 1)
+
+    if largest == 0:
+        return 0.1, 1.0
+
+    return np.log(2) / largest, np.log(100) / smallest
+
+def spin_energies(s, h, field, offset):
+    '''Returns the energy of each row of spins given field = h + s J'''
+
+    return offset + 0.5 * np.einsum('ij,ij->i', s, h + field)
+
+class LocalIsingSampler(dimod.Sampler):
+    """Local stand-in for EmbeddingComposite(DWaveSampler()).
+
+    All reads are sampled at once: the variables are split into independent
+    sets by coloring the coupling graph, and a Metropolis sweep updates one
+    whole set for every read with a few numpy operations. Two methods:
+
+        - 'annealing': simulated annealing from a hot to a cold inverse
+          temperature over num_sweeps sweeps
+        - 'tempering': parallel tempering, num_replicas copies of each read
+          at fixed temperatures between the same bounds, exchanging
+          states between neighbouring temperatures after every sweep
+
+    Each read returns the lowest-energy state it visited. The reads can be
+    split across threads (numpy releases the GIL in its array operations).
+
+    Example:
+        sampler = LocalIsingSampler()
+        sampleset = sampler.sample_qubo(Q, num_reads=100)
+    """
+
+    @property
+    def parameters(self):
+        return {'num_reads': [], 'num_sweeps': [], 'beta_range': [], 'method': ['methods'],
+                'num_replicas': [], 'num_threads': [], 'seed': [], 'label': [], 'chain_strength': []}
+
+    @property
+    def properties(self):
+        return {'methods': METHODS}
+
+    def sample(self, bqm, num_reads=10, num_sweeps=1000, beta_range=None, method='annealing', num_replicas=8,
+               num_threads=1, seed=None, label=None, chain_strength=None):
+        """Returns a dimod.SampleSet for the BQM.
+
+        Args:
+            bqm (BinaryQuadraticModel): The model to sample
+            num_reads (int): Number of samples returned
+            num_sweeps (int): Sweeps over all the variables per read
+            beta_range (tuple): Hottest and coldest inverse temperatures;
+                by default from the smallest and largest possible flip energy
+            method (str): 'annealing' or 'tempering'
+            num_replicas (int): Temperatures per read for 'tempering'
+            num_threads (int): Threads the reads are split across
+            seed (int): Random seed
+            label, chain_strength: Accepted for compatibility with the QPU samplers
+
+        Returns:
+            dimod.SampleSet in the vartype of bqm
+        """
+        if method not in METHODS:
+            raise ValueError("method must be one of {}, not {!r}".format(METHODS, method))
+
+        start = time.perf_counter()
+        variables, h, J, offset = ising_arrays(bqm)
+
+        if beta_range is None:
+            beta_range = default_beta_range(h, J)
+        classes = color_classes(J) if len(variables) else []
+
+        # Independent random streams, one per thread
+        num_threads = max(1, min(num_threads, num_reads))
+        seeds = np.random.SeedSequence(seed).spawn(num_threads)
+        reads = np.array_split(np.arange(num_reads), num_threads)
+        tasks = [(len(part), h, J, offset, classes, num_sweeps, beta_range, method, num_replicas, s)
+                 for part, s in zip(reads, seeds)]
+
+        if num_threads > 1:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                spins = np.vstack(list(executor.map(lambda task: anneal(*task), tasks)))
+        else:
+            spins = anneal(*tasks[0])
+
+        samples = spins if bqm.vartype is dimod.SPIN else (spins + 1) // 2
+
+        return dimod.SampleSet.from_samples_bqm((samples.astype(np.int8), variables), bqm,
+                                                info={'method': method, 'beta_range': tuple(beta_range),
+                                                      'num_colors': len(classes),
+                                                      'run_time': time.perf_counter() - start})
+
+def anneal(num_reads, h, J, offset, classes, num_sweeps, beta_range, method, num_replicas, seed):
+    """Samples num_reads reads of the Ising model (h, J, offset).
+
+    Returns:
+        (num_reads x variables) array of the lowest-energy spins of each read
+    """
+    rng = np.random.default_rng(seed)
+    n = len(h)
+    hot, cold = beta_range
+
+    if method == 'tempering':
+        replicas = max(2, num_replicas)
+        betas = np.tile(np.geomspace(hot, cold, replicas), num_reads)
+    else:
+        replicas = 1
+        schedule = np.geomspace(hot, cold, num_sweeps)
+
+    # One row per (read, replica), replicas of a read next to each other from hottest to coldest
+    s = rng.choice([-1.0, 1.0], size=(num_reads * replicas, n))
+    field = h + (J @ s.T).T
+    rows = [J[c] for c in classes]
+
+    best = s.copy()
+    best_energy = np.full(len(s), np.inf)
+
+    for sweep in range(num_sweeps):
+        beta = betas if method == 'tempering' else np.full(len(s), schedule[sweep])
+
+        for c, Jc in zip(classes, rows):
+            delta = -2 * s[:, c] * field[:, c]
+            accept = (delta <= 0) | (rng.random(delta.shape) < np.exp(-beta[:, np.newaxis] * np.maximum(delta, 0)))
+            step = np.where(accept, -2 * s[:, c], 0)
+
+            s[:, c] += step
+            field += (Jc.T @ step.T).T
+
+        energy = spin_energies(s, h, field, offset)
+        better = energy < best_energy
+        best[better], best_energy[better] = s[better], energy[better]
+
+        if method == 'tempering':
+            # Exchange states between neighbouring temperatures, even or odd pairs in turn
+            energy = energy.reshape(num_reads, replicas)
+            b = betas[:replicas]
+            for k in range(sweep % 2, replicas - 1, 2):
+                exchange = rng.random(num_reads) < np.exp(np.minimum((b[k+1] - b[k]) * (energy[:, k+1] - energy[:, k]), 0))
+                lower = np.flatnonzero(exchange) * replicas + k
+                s[lower], s[lower + 1] = s[lower + 1].copy(), s[lower].copy()
+                field[lower], field[lower + 1] = field[lower + 1].copy(), field[lower].copy()
+
+    # The best state of each read over its replicas
+    best_energy = best_energy.reshape(num_reads, replicas)
+    chosen = np.arange(num_reads) * replicas + np.argmin(best_energy, axis=1)
+
+    return best[chosen]
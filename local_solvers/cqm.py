@@ -0,0 +1,224 @@
+"""Local stand-in for LeapHybridCQMSampler."""
+
+import time
+
+import dimod
+import numpy as np
+from scipy import sparse
+
+# Constraint senses, as stored in the sense vector of cqm_arrays
+LE, GE, EQ = 0, 1, 2
+SENSES = {'<=': LE, '>=': GE, '==': EQ}
+
+def cqm_arrays(cqm):
+    """Returns the numpy representation of a binary CQM with linear constraints.
+
+    Args:
+        cqm (ConstrainedQuadraticModel): The CQM to convert
+
+    Returns:
+        Dictionary with the variable labels, the objective as linear vector,
+        symmetric coupling matrix and offset, and the constraints as labels,
+        (constraints x variables) matrix, sense vector and right-hand side
+    """
+    variables = list(cqm.variables)
+    index = {v: i for i, v in enumerate(variables)}
+    n = len(variables)
+
+    for v in variables:
+        if cqm.vartype(v) is not dimod.BINARY:
+            raise ValueError("LocalCQMSampler only supports binary variables, {!r} is {}".format(v, cqm.vartype(v).name))
+
+    objective = cqm.objective
+
+    linear = np.zeros(n)
+    for v, bias in objective.linear.items():
+        linear[index[v]] = bias
+
+    irow, icol, qdata = [], [], []
+    for (u, v), bias in objective.quadratic.items():
+        irow.append(index[u])
+        icol.append(index[v])
+        qdata.append(bias)
+    coupling = sparse.coo_matrix((qdata + qdata, (irow + icol, icol + irow)), shape=(n, n)).tocsc()
+
+    labels, rows, cols, data, sense, rhs = [], [], [], [], [], []
+    for label, constraint in cqm.constraints.items():
+        if constraint.lhs.num_interactions:
+            raise ValueError("LocalCQMSampler only supports linear constraints, {!r} is quadratic".format(label))
+
+        for v, bias in constraint.lhs.linear.items():
+            rows.append(len(labels))
+            cols.append(index[v])
+            data.append(bias)
+
+        sense.append(SENSES[constraint.sense.value])
+        rhs.append(constraint.rhs - constraint.lhs.offset)
+        labels.append(label)
+
+    matrix = sparse.coo_matrix((data, (rows, cols)), shape=(len(labels), n)).tocsc()
+
+    return {'variables': variables, 'linear': linear, 'coupling': coupling, 'offset': objective.offset,
+            'labels': labels, 'matrix': matrix, 'sense': np.array(sense, dtype=np.int64), 'rhs': np.array(rhs, dtype=float)}
+
+def violation(lhs, rhs, sense):
+    """Returns how much each constraint is violated, elementwise (0 when satisfied)"""
+
+    diff = lhs - rhs
+
+    return np.where(sense == LE, np.maximum(diff, 0), np.where(sense == GE, np.maximum(-diff, 0), np.abs(diff)))
+
+def sparse_columns(matrix):
+    """Returns the (row indices, values) of each column of a CSC matrix"""
+
+    return [(matrix.indices[matrix.indptr[j]:matrix.indptr[j+1]], matrix.data[matrix.indptr[j]:matrix.indptr[j+1]])
+            for j in range(matrix.shape[1])]
+
+class LocalCQMSampler:
+    """Local stand-in for LeapHybridCQMSampler based on penalty-adaptive simulated annealing.
+
+    Constraints are added to the objective as weighted violation penalties.
+    All reads are annealed in parallel (vectorized with numpy) in rounds:
+    after each round the weight of every constraint still violated is
+    doubled and the next round reheats from the current states. The best
+    state each read visits (feasible first, then lowest objective) is returned.
+
+    Only binary variables and linear constraints are supported, which covers
+    the portfolio and workload CQMs in this repository.
+    """
+
+    def __init__(self):
+        self.properties = {}
+        self.parameters = {'time_limit': [], 'num_reads': [], 'num_sweeps': [], 'max_rounds': [], 'seed': []}
+
+    def sample_cqm(self, cqm, time_limit=None, num_reads=16, num_sweeps=100, max_rounds=10, seed=None, label=None):
+        """Returns a dimod.SampleSet for the CQM.
+
+        Args:
+            cqm (ConstrainedQuadraticModel): The CQM to sample
+            time_limit (float): Maximum run time in seconds. Rounds stop earlier
+                once every read is feasible or after max_rounds rounds
+            num_reads (int): Number of samples returned (annealed in parallel)
+            num_sweeps (int): Sweeps over all the variables per round
+            max_rounds (int): Largest number of rounds
+            seed (int): Random seed
+            label (str): Accepted for compatibility with LeapHybridCQMSampler
+
+        Returns:
+            dimod.SampleSet with is_feasible and is_satisfied fields
+        """
+        arrays = cqm_arrays(cqm)
+        samples, info = self.sample_arrays(arrays, time_limit, num_reads, num_sweeps, max_rounds, seed)
+
+        return dimod.SampleSet.from_samples_cqm((samples, arrays['variables']), cqm, info=info)
+
+    def sample_arrays(self, arrays, time_limit=None, num_reads=16, num_sweeps=100, max_rounds=10, seed=None,
+                      initial_states=None):
+        """Samples a model given in the format of cqm_arrays.
+
+        Callers solving many models that only differ in their coefficients
+        (see the portfolio frontier) can update the arrays in place of
+        rebuilding a CQM for each one.
+
+        Args:
+            arrays (dict): Model as returned by cqm_arrays
+            time_limit, num_reads, num_sweeps, max_rounds, seed: See sample_cqm
+            initial_states (2D array): Warm-start states, one per row. The first
+                reads start from them and they count as visited, so those reads
+                never return a state worse than their starting one
+
+        Returns:
+            Tuple (samples, info): (num_reads x variables) int8 array of the best
+            state of each read and the info dictionary of sample_cqm
+        """
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        rng = np.random.default_rng(seed)
+
+        linear, coupling, matrix = arrays['linear'], arrays['coupling'], arrays['matrix']
+        sense, rhs = arrays['sense'], arrays['rhs']
+        n, m = len(linear), len(rhs)
+
+        # Normalize each constraint so one unit of violation is comparable across constraints
+        scale = abs(matrix).max(axis=1).toarray().ravel() if m else np.empty(0)
+        scale[scale == 0] = 1
+        matrix = sparse.csc_matrix(sparse.diags(1 / scale) @ matrix) if m else matrix
+        rhs = rhs / scale
+
+        # Per-variable neighbourhoods, so a flip only touches what it changes
+        couplings = sparse_columns(coupling)
+        columns = sparse_columns(matrix)
+
+        # Largest objective change of a single flip sets the temperature and initial penalty scale
+        objective_scale = max((np.abs(linear) + abs(coupling).sum(axis=0).A1).max(initial=0), 1e-9)
+        weights = np.full(m, objective_scale)
+
+        x = rng.integers(2, size=(num_reads, n)).astype(float)
+        warm = 0
+        if initial_states is not None:
+            initial_states = np.asarray(initial_states, dtype=float).reshape(-1, n)
+            warm = min(len(initial_states), num_reads)
+            x[:warm] = initial_states[:warm]
+
+        field = linear + x @ coupling
+        lhs = x @ matrix.T if m else np.empty((num_reads, 0))
+
+        # Warm-start states count as visited, random ones do not
+        best_x = x.copy()
+        best_violation = violation(lhs, rhs, sense)
+        best_violation = np.where(best_violation > 1e-9, best_violation, 0).sum(axis=1)
+        best_objective = 0.5 * np.einsum('ij,ij->i', x, linear + field)
+        best_violation[warm:] = np.inf
+        num_rounds = 0
+
+        while True:
+            energy_scale = objective_scale + weights.max(initial=0)
+            betas = np.geomspace(np.log(2) / energy_scale, 100 * np.log(100) / objective_scale, num_sweeps)
+
+            for beta in betas:
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+
+                for j in range(n):
+                    flip = 1 - 2 * x[:, j]
+                    delta = flip * field[:, j]
+
+                    rows, a = columns[j]
+                    if len(rows):
+                        before = lhs[:, rows]
+                        after = before + flip[:, np.newaxis] * a
+                        delta += (violation(after, rhs[rows], sense[rows]) - violation(before, rhs[rows], sense[rows])) @ weights[rows]
+
+                    accept = (delta <= 0) | (rng.random(num_reads) < np.exp(-beta * np.maximum(delta, 0)))
+                    if not accept.any():
+                        continue
+
+                    step = flip * accept
+                    x[accept, j] += step[accept]
+
+                    neighbours, q = couplings[j]
+                    if len(neighbours):
+                        field[:, neighbours] += step[:, np.newaxis] * q
+                    if len(rows):
+                        lhs[:, rows] += step[:, np.newaxis] * a
+
+                # Keep the best state each read visits: least violation, then lowest objective
+                violations = violation(lhs, rhs, sense)
+                total_violation = np.where(violations > 1e-9, violations, 0).sum(axis=1)
+                objective = 0.5 * np.einsum('ij,ij->i', x, linear + field)
+                better = (total_violation < best_violation) | ((total_violation == best_violation) & (objective < best_objective))
+                best_x[better], best_violation[better], best_objective[better] = x[better], total_violation[better], objective[better]
+
+            num_rounds += 1
+
+            if num_rounds >= max_rounds or not best_violation.any():
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+            # Adapt: push harder on the constraints that are still violated
+            weights[(violations > 1e-9).any(axis=0)] *= 2
+
+        return best_x.astype(np.int8), {'num_rounds': num_rounds,
+                                        'penalties': dict(zip(arrays['labels'], weights / scale)),
+                                        'run_time': time.perf_counter() - start}
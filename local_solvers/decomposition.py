@@ -0,0 +1,195 @@
+"""Component-wise solving of binary quadratic models."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import dimod
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+def component_labels(bqm):
+    """Returns the connected component of each variable of a BQM.
+
+    Returns:
+        Tuple (variables, labels): the BQM variables and, in the same order,
+        the index of their component
+    """
+    variables = list(bqm.variables)
+    _, (irow, icol, _), _ = bqm.to_numpy_vectors(variable_order=variables)
+
+    n = len(variables)
+    graph = sparse.coo_matrix((np.ones(len(irow)), (irow, icol)), shape=(n, n))
+
+    return variables, connected_components(graph, directed=False)[1]
+
+def split_components(bqm):
+    """Splits a BQM into the BQMs of its connected components.
+
+    Variables without interactions are not returned as components, they
+    are solved directly from their linear bias (see isolated_solution).
+
+    Returns:
+        Tuple (components, isolated): list of BQMs with two or more
+        variables, and the list of variables without interactions
+    """
+    variables, labels = component_labels(bqm)
+    linear, (irow, icol, qdata), _ = bqm.to_numpy_vectors(variable_order=variables)
+
+    sizes = np.bincount(labels)
+    isolated = [variables[i] for i in np.flatnonzero(sizes[labels] == 1)]
+
+    # Group variables and interactions by component
+    node_order = np.argsort(labels, kind='stable')
+    node_starts = np.concatenate(([0], np.cumsum(sizes)))
+    edge_labels = labels[irow]
+    edge_order = np.argsort(edge_labels, kind='stable')
+    edge_starts = np.concatenate(([0], np.cumsum(np.bincount(edge_labels, minlength=len(sizes)))))
+
+    position = np.empty(len(variables), dtype=np.int64)
+    position[node_order] = np.arange(len(variables)) - node_starts[labels[node_order]]
+
+    components = []
+    for c in np.flatnonzero(sizes > 1):
+        nodes = node_order[node_starts[c]:node_starts[c+1]]
+        edges = edge_order[edge_starts[c]:edge_starts[c+1]]
+
+        components.append(dimod.BinaryQuadraticModel.from_numpy_vectors(
+            linear[nodes], (position[irow[edges]], position[icol[edges]], qdata[edges]), 0, bqm.vartype,
+            variable_order=[variables[i] for i in nodes]))
+
+    return components, isolated
+
+def isolated_solution(bqm, variables):
+    '''Returns the best value of variables without interactions, from the sign of their linear bias'''
+
+    low, high = (0, 1) if bqm.vartype is dimod.BINARY else (-1, 1)
+
+    return {v: high if bqm.get_linear(v) < 0 else low for v in variables}
+
+def solve_components(task):
+    """Solves a group of component BQMs with one sampler.
+
+    Args:
+        task (tuple): (sampler factory, list of BQMs, sampler parameters)
+
+    Returns:
+        List of (variables, samples) with the num_reads (default 1) best
+        samples of each component, ordered by increasing energy
+    """
+    factory, components, parameters = task
+
+    # Exhaustive solvers return every state: only the rows that can be stitched are kept
+    num_reads = max(1, parameters.get('num_reads') or 1)
+
+    sampler = factory()
+    parameters = {k: v for k, v in parameters.items() if k in sampler.parameters}
+
+    results = []
+    for bqm in components:
+        sampleset = sampler.sample(bqm, **parameters).aggregate()
+        order = np.argsort(sampleset.record.energy, kind='stable')
+        results.append((list(sampleset.variables), sampleset.record.sample[order[:num_reads]]))
+
+    return results
+
+class ComponentSampler(dimod.Sampler):
+    """Samples each connected component of a BQM separately and stitches the results.
+
+    Components are independent subproblems, so the best sample of the whole
+    BQM is made of the best sample of each component and its energy is the
+    sum of theirs (plus the offset). Components are grouped by size onto the
+    given samplers and the groups are solved concurrently in worker
+    processes. Variables without interactions are set from their linear bias.
+
+    Row r of the returned sampleset joins the r-th best sample of each
+    component (components with fewer samples repeat their last one), for at
+    most num_reads rows (1 by default), so exhaustive solvers returning every
+    state of a component do not multiply the rows. When
+    the whole BQM is a single component, the sampler's own sampleset is
+    returned unchanged, so its info (timing, embedding) is kept.
+
+    Args:
+        solvers (list): (max_variables, sampler_factory) pairs in increasing
+            size. A component goes to the first sampler whose max_variables
+            is at least its size (None for no limit). Factories are called
+            without arguments in the worker processes, so they must be
+            picklable, for example sampler classes or module-level functions
+        workers (int): Number of worker processes
+        min_task_size (int): Small components are sent to the workers in
+            groups of at least this many variables
+
+    Example:
+        sampler = ComponentSampler([(20, dimod.ExactSolver), (None, LeapHybridSampler)])
+        sampleset = sampler.sample(bqm)
+    """
+
+    def __init__(self, solvers, workers=None, min_task_size=1000):
+        self.solvers = list(solvers)
+        self.workers = workers
+        self.min_task_size = min_task_size
+
+    @property
+    def parameters(self):
+        return {'num_reads': [], 'time_limit': [], 'chain_strength': [], 'label': []}
+
+    @property
+    def properties(self):
+        return {'solvers': self.solvers}
+
+    def solver_for(self, size):
+        '''Returns the sampler factory for a component of the given size'''
+
+        for max_variables, factory in self.solvers:
+            if max_variables is None or size <= max_variables:
+                return factory
+
+        raise ValueError("no solver for components of {} variables".format(size))
+
+    def sample(self, bqm, **parameters):
+        """Samples the BQM component by component.
+
+        Args:
+            bqm (BinaryQuadraticModel): The model to sample
+            **parameters: Passed to each sampler that accepts them
+
+        Returns:
+            dimod.SampleSet over all the variables of bqm
+        """
+        components, isolated = split_components(bqm)
+
+        if len(components) == 1 and not isolated:
+            sampler = self.solver_for(bqm.num_variables)()
+            return sampler.sample(bqm, **{k: v for k, v in parameters.items() if k in sampler.parameters})
+
+        # Group components by sampler, in tasks of at least min_task_size variables
+        tasks = []
+        for factory in dict.fromkeys(self.solver_for(c.num_variables) for c in components):
+            group, size = [], 0
+            for component in components:
+                if self.solver_for(component.num_variables) is factory:
+                    group.append(component)
+                    size += component.num_variables
+                    if size >= self.min_task_size:
+                        tasks.append((factory, group, parameters))
+                        group, size = [], 0
+            if group:
+                tasks.append((factory, group, parameters))
+
+        if len(tasks) > 1 and self.workers != 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = [result for task in executor.map(solve_components, tasks) for result in task]
+        else:
+            results = [result for task in tasks for result in solve_components(task)]
+
+        # Stitch: row r takes the r-th best sample of every component
+        num_rows = max([len(samples) for _, samples in results], default=1)
+        variables = list(isolated)
+        values = np.array(list(isolated_solution(bqm, isolated).values()), dtype=np.int8)
+        columns = [np.tile(values, (num_rows, 1))]
+        for labels, samples in results:
+            rows = np.minimum(np.arange(num_rows), len(samples) - 1)
+            variables.extend(labels)
+            columns.append(samples[rows])
+
+        return dimod.SampleSet.from_samples_bqm((np.hstack(columns), variables), bqm,
+                                                info={'num_components': len(components) + len(isolated)})
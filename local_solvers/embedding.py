@@ -0,0 +1,207 @@
+"""Persistent cache of minor embeddings for repeated QPU submissions."""
+
+import hashlib
+import json
+import os
+
+import dimod
+import minorminer
+import numpy as np
+from dwave.system import FixedEmbeddingComposite
+
+# Where embeddings are kept, shared by all the scripts of the repository
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '.cache', 'embeddings')
+
+# Embeddings kept before the least recently used are evicted
+MAX_ENTRIES = 256
+
+# Version of the cache file layout
+CACHE_VERSION = 1
+
+def plain(label):
+    '''Returns numpy scalar labels as the equivalent Python values, so equal labels hash the same'''
+
+    return label.item() if isinstance(label, np.generic) else label
+
+class GraphSignature:
+    """Canonical form of a graph: its nodes sorted by repr, its edges as node positions, and their hash.
+
+    Args:
+        graph: A BQM, a QUBO/Ising dict keyed by (u, v) pairs, a networkx
+            graph, or a list of edges. Self-loops (for example the linear
+            terms of a QUBO dict) only add their node
+    """
+
+    def __init__(self, graph):
+        if isinstance(graph, dimod.BinaryQuadraticModel):
+            nodes, pairs = list(graph.variables), list(graph.quadratic)
+        elif hasattr(graph, 'nodes') and hasattr(graph, 'edges'):
+            nodes, pairs = list(graph.nodes), list(graph.edges)
+        else:
+            nodes, pairs = [], list(graph)
+
+        nodes = {plain(v) for v in nodes}
+        nodes.update(plain(v) for pair in pairs for v in pair)
+        self.nodes = sorted(nodes, key=repr)
+
+        position = {v: i for i, v in enumerate(self.nodes)}
+        edges = {tuple(sorted((position[plain(u)], position[plain(v)]))) for u, v in pairs if plain(u) != plain(v)}
+        self.edges = sorted(edges)
+
+        digest = hashlib.sha1()
+        digest.update(json.dumps([[repr(v) for v in self.nodes], self.edges]).encode())
+        self.digest = digest.hexdigest()
+
+class EmbeddingCache:
+    """Minor embeddings stored on disk, keyed by the hashes of the source and target graphs.
+
+    Each embedding is a JSON file named after the two hashes, holding the
+    chains as positions in the canonical node lists (see GraphSignature),
+    so any source graph with the same structure and labels reuses it. The
+    file modification time records the last use, and the least recently
+    used files are removed beyond max_entries.
+
+    Args:
+        cache_dir (str): Directory of the embedding files
+        max_entries (int): Largest number of embeddings kept
+
+    Example:
+        embedding = EmbeddingCache().find_embedding(Q, qpu.edgelist)
+        sampler = FixedEmbeddingComposite(qpu, embedding)
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def filename(self, source, target):
+        '''Returns the cache file of the embedding of source (GraphSignature) in target'''
+
+        return os.path.join(self.cache_dir, 'embedding_{}_{}.json'.format(source.digest, target.digest))
+
+    def get(self, source, target):
+        """Returns the cached embedding of source in target, or None.
+
+        Args:
+            source, target (GraphSignature): Canonical source and target graphs
+        """
+        filename = self.filename(source, target)
+
+        try:
+            with open(filename) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('version') != CACHE_VERSION:
+            return None
+
+        # Mark as recently used
+        os.utime(filename)
+
+        return {source.nodes[i]: [target.nodes[q] for q in chain] for i, chain in enumerate(entry['chains'])}
+
+    def put(self, source, target, embedding):
+        '''Stores the embedding of source in target, then evicts the least recently used embeddings'''
+
+        position = {q: i for i, q in enumerate(target.nodes)}
+        chains = [[position[plain(q)] for q in embedding[v]] for v in source.nodes]
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        filename = self.filename(source, target)
+        partial = '{}.{}'.format(filename, os.getpid())
+        with open(partial, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'chains': chains}, f)
+        os.replace(partial, filename)
+
+        self.evict()
+
+    def evict(self):
+        '''Removes the least recently used embeddings beyond max_entries'''
+
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if name.startswith('embedding_') and name.endswith('.json')]
+        entries.sort(key=os.path.getmtime)
+
+        for filename in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def find_embedding(self, source, target, **parameters):
+        """Returns an embedding of source in target, from the cache or found with minorminer.
+
+        Args:
+            source, target: Graphs in any form accepted by GraphSignature,
+                or GraphSignature objects
+            **parameters: Passed to minorminer.find_embedding
+
+        Returns:
+            dict: Chain of target nodes of each source node
+        """
+        source = source if isinstance(source, GraphSignature) else GraphSignature(source)
+        target = target if isinstance(target, GraphSignature) else GraphSignature(target)
+
+        embedding = self.get(source, target)
+        if embedding is not None:
+            return embedding
+
+        # Search in node positions; isolated source nodes are kept as self-loops
+        connected = {i for edge in source.edges for i in edge}
+        edges = source.edges + [(i, i) for i in range(len(source.nodes)) if i not in connected]
+        found = minorminer.find_embedding(edges, target.edges, **parameters)
+
+        if len(found) < len(source.nodes):
+            raise ValueError("no embedding found for a graph of {} nodes and {} edges".format(
+                len(source.nodes), len(source.edges)))
+
+        embedding = {source.nodes[i]: [target.nodes[q] for q in chain] for i, chain in found.items()}
+        self.put(source, target, embedding)
+
+        return embedding
+
+class CachedEmbeddingComposite(dimod.ComposedSampler):
+    """Drop-in replacement of EmbeddingComposite that reuses cached embeddings.
+
+    Each problem is embedded through an EmbeddingCache and sampled with a
+    FixedEmbeddingComposite, so the same problem graph is only embedded
+    once, across calls and across runs.
+
+    Args:
+        child (dimod.Sampler): Structured sampler, such as DWaveSampler
+        cache (EmbeddingCache): Embedding cache, the default one if None
+        embedding_parameters (dict): Passed to minorminer.find_embedding
+
+    Example:
+        sampler = CachedEmbeddingComposite(DWaveSampler())
+        sampleset = sampler.sample_qubo(Q, num_reads=100)
+    """
+
+    def __init__(self, child, cache=None, embedding_parameters=None):
+        self._children = [child]
+        self.cache = EmbeddingCache() if cache is None else cache
+        self.embedding_parameters = embedding_parameters or {}
+        self.target = GraphSignature(child.edgelist)
+
+    @property
+    def children(self):
+        return self._children
+
+    @property
+    def parameters(self):
+        parameters = dict(self.child.parameters)
+        parameters.update(chain_strength=[], chain_break_method=[], chain_break_fraction=[],
+                          return_embedding=[], warnings=[])
+        return parameters
+
+    @property
+    def properties(self):
+        return {'child_properties': self.child.properties.copy()}
+
+    def sample(self, bqm, **parameters):
+        '''Samples the BQM on the child through its cached embedding'''
+
+        embedding = self.cache.find_embedding(bqm, self.target, **self.embedding_parameters)
+
+        return FixedEmbeddingComposite(self.child, embedding).sample(bqm, **parameters)
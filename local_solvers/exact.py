@@ -0,0 +1,154 @@
+"""Exact solver for small BQMs by Gray-code enumeration of all states."""
+
+import time
+
+import dimod
+import numpy as np
+
+# Largest number of variables enumerated (2**30 states take seconds)
+MAX_VARIABLES = 30
+
+# Variables enumerated together in one numpy block of 2**BLOCK_BITS states
+BLOCK_BITS = 16
+
+# Energies are grouped into levels after rounding to this many decimals
+DECIMALS = 9
+
+def binary_arrays(bqm):
+    """Returns the binary form of a BQM as dense arrays.
+
+    Returns:
+        Tuple (variables, linear, Q, offset) with Q the symmetric coupling
+        matrix (zero diagonal) of the binary-valued model
+    """
+    variables = list(bqm.variables)
+    linear, (irow, icol, qdata), offset = bqm.binary.to_numpy_vectors(variable_order=variables)
+
+    n = len(variables)
+    Q = np.zeros((n, n))
+    np.add.at(Q, (irow, icol), qdata)
+    np.add.at(Q, (icol, irow), qdata)
+
+    return variables, np.asarray(linear, dtype=float), Q, float(offset)
+
+def block_energies(linear, Q):
+    """Returns the energy of every state of the given variables.
+
+    The energies are built by doubling: the states with variable i set are
+    the states of variables 0 .. i-1 plus the bias of i and its couplings.
+    State s has variable i set when bit i of s is.
+    """
+    energies = np.zeros(1)
+    bits = np.zeros((1, 0), dtype=bool)
+
+    for i in range(len(linear)):
+        energies = np.concatenate((energies, energies + linear[i] + bits @ Q[:i, i]))
+        bits = np.vstack((np.column_stack((bits, np.zeros(len(bits), dtype=bool))),
+                          np.column_stack((bits, np.ones(len(bits), dtype=bool)))))
+
+    return energies
+
+def linear_energies(field):
+    '''Returns the linear energy (field . x) of every state x of len(field) variables, by doubling'''
+
+    energies = np.zeros(1)
+    for f in field:
+        energies = np.concatenate((energies, energies + f))
+
+    return energies
+
+class GrayCodeSolver(dimod.Sampler):
+    """Exact solver for BQMs of up to MAX_VARIABLES variables.
+
+    Every state is enumerated. The first BLOCK_BITS variables are enumerated
+    together as one numpy block, and the remaining (high) variables in Gray
+    code order: consecutive blocks differ by one high variable, so its field
+    on the block and the energy of the high variables are updated
+    incrementally instead of recomputed.
+
+    The returned sampleset holds all the ground states (up to
+    max_ground_states of them). Its info gives the ground-state degeneracy
+    and the spectrum: the lowest num_levels distinct energies and how many
+    states have each.
+
+    Example:
+        sampleset = GrayCodeSolver().sample_qubo(Q)
+        print(sampleset.info['degeneracy'], sampleset.info['spectrum'])
+    """
+
+    @property
+    def parameters(self):
+        return {'num_levels': [], 'max_ground_states': [], 'num_reads': [], 'label': [], 'chain_strength': []}
+
+    @property
+    def properties(self):
+        return {'max_variables': MAX_VARIABLES}
+
+    def sample(self, bqm, num_levels=10, max_ground_states=1024, num_reads=None, label=None, chain_strength=None):
+        """Returns the ground states of the BQM.
+
+        Args:
+            bqm (BinaryQuadraticModel): The model to solve
+            num_levels (int): Number of lowest energy levels in the spectrum
+            max_ground_states (int): Largest number of ground states returned
+            num_reads, label, chain_strength: Accepted for compatibility with
+                the QPU samplers
+
+        Returns:
+            dimod.SampleSet with info 'degeneracy', 'spectrum' (list of
+            (energy, number of states)) and 'num_states'
+        """
+        n = bqm.num_variables
+        if n > MAX_VARIABLES:
+            raise ValueError("GrayCodeSolver enumerates at most {} variables, the BQM has {}".format(MAX_VARIABLES, n))
+
+        start = time.perf_counter()
+        variables, linear, Q, offset = binary_arrays(bqm)
+
+        k = min(n, BLOCK_BITS)
+        low_energies = block_energies(np.zeros(k), Q[:k, :k])
+        low_linear = linear[:k].copy()
+        coupling = Q[:k, k:]
+
+        high = np.zeros(n - k, dtype=bool)
+        high_energy = offset
+        levels = {}
+        ground, ground_states = np.inf, []
+
+        for t in range(2 ** (n - k)):
+            if t:
+                # Gray code: step t flips the high variable of the lowest set bit of t
+                j = (t & -t).bit_length() - 1
+                sign = -1 if high[j] else 1
+                high_energy += sign * (linear[k + j] + Q[k + j, k:] @ high)
+                low_linear += sign * coupling[:, j]
+                high[j] = not high[j]
+
+            energies = low_energies + linear_energies(low_linear) + high_energy
+
+            # Spectrum: merge the levels of this block that may be among the lowest num_levels
+            threshold = max(levels) if len(levels) >= num_levels else np.inf
+            candidates = np.round(energies[energies <= threshold], DECIMALS)
+            if len(candidates):
+                values, counts = np.unique(candidates, return_counts=True)
+                for value, count in zip(values.tolist(), counts.tolist()):
+                    levels[value] = levels.get(value, 0) + count
+                levels = dict(sorted(levels.items())[:num_levels])
+
+            # Ground states, as state indices: bit i of the index is variable i
+            lowest = min(levels)
+            if lowest < ground:
+                ground, ground_states = lowest, []
+            if len(ground_states) < max_ground_states and len(candidates) and candidates.min() <= ground:
+                found = np.flatnonzero(np.round(energies, DECIMALS) == ground)
+                prefix = int(np.dot(high, 1 << np.arange(n - k))) << k
+                ground_states.extend((prefix + found[:max_ground_states - len(ground_states)]).tolist())
+
+        states = np.array(ground_states, dtype=np.int64)
+        samples = ((states[:, np.newaxis] >> np.arange(n)) & 1).astype(np.int8)
+        if bqm.vartype is dimod.SPIN:
+            samples = 2 * samples - 1
+
+        return dimod.SampleSet.from_samples_bqm((samples, variables), bqm,
+                                                info={'degeneracy': levels[ground], 'spectrum': list(levels.items()),
+                                                      'num_states': 2 ** n, 'run_time': time.perf_counter() - start})
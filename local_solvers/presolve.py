@@ -0,0 +1,222 @@
+"""Feasibility-first presolve for constrained quadratic models."""
+
+import copy
+
+import dimod
+import numpy as np
+
+# Tolerance used when comparing activities and bounds
+ATOL = 1e-9
+
+class Presolver:
+    """Reduces a CQM before it is sent to a sampler.
+
+    Reductions are repeated until nothing changes:
+
+        - bound tightening from the activity range of each linear constraint,
+          which fixes binaries that can never (or must always) be chosen,
+          for example a stock whose price alone exceeds the budget
+        - removal of constraints that are always satisfied
+        - fixing of dominated variables: if raising a variable can never
+          lower the objective and never helps any constraint, it is set to
+          its lower bound (and symmetrically to its upper bound)
+
+    Quadratic constraints are kept as they are and their variables are never
+    treated as dominated. Spin and real variables are left free.
+
+    Example:
+        presolver = Presolver(cqm)
+        reduced = presolver.apply()
+        sampleset = presolver.restore_samples(sampler.sample_cqm(reduced))
+
+    Args:
+        cqm (ConstrainedQuadraticModel): The model to reduce (not modified)
+    """
+
+    def __init__(self, cqm):
+        self.original = cqm
+        self.fixed = {}
+        self.removed_constraints = []
+        self.infeasible_constraints = []
+
+    def apply(self):
+        """Runs the reductions and returns the reduced CQM"""
+
+        cqm = self.original
+        variables = list(cqm.variables)
+        index = {v: i for i, v in enumerate(variables)}
+        n = len(variables)
+
+        vartypes = [cqm.vartype(v) for v in variables]
+        integral = np.array([vt in (dimod.BINARY, dimod.INTEGER) for vt in vartypes])
+        lower = np.array([cqm.lower_bound(v) if vt is not dimod.SPIN else -1 for v, vt in zip(variables, vartypes)], dtype=float)
+        upper = np.array([cqm.upper_bound(v) if vt is not dimod.SPIN else 1 for v, vt in zip(variables, vartypes)], dtype=float)
+        tightenable = np.array([vt is not dimod.SPIN for vt in vartypes])
+
+        # Linear constraints as (label, variable indices, coefficients, sense, rhs)
+        linear_constraints = []
+        locked = np.zeros(n, dtype=bool)
+        up_locks = np.zeros(n, dtype=np.int64)
+        down_locks = np.zeros(n, dtype=np.int64)
+        for label, constraint in cqm.constraints.items():
+            lhs = constraint.lhs
+            if lhs.num_interactions or any(lhs.vartype(v) is dimod.SPIN for v in lhs.variables):
+                locked[[index[v] for v in lhs.variables]] = True
+                continue
+
+            idx = np.array([index[v] for v in lhs.linear], dtype=np.int64)
+            coef = np.array(list(lhs.linear.values()), dtype=float)
+            sense = constraint.sense.value
+            linear_constraints.append((label, idx, coef, sense, constraint.rhs - lhs.offset))
+
+            # Which direction of each variable can break this constraint
+            if sense in ('<=', '=='):
+                np.add.at(up_locks, idx[coef > 0], 1)
+                np.add.at(down_locks, idx[coef < 0], 1)
+            if sense in ('>=', '=='):
+                np.add.at(up_locks, idx[coef < 0], 1)
+                np.add.at(down_locks, idx[coef > 0], 1)
+
+        # Objective as linear vector and quadratic triplets
+        objective = cqm.objective
+        linear = np.zeros(n)
+        for v, bias in objective.linear.items():
+            linear[index[v]] = bias
+        quadratic = [(index[u], index[v], bias) for (u, v), bias in objective.quadratic.items()]
+        qrow = np.array([u for u, _, _ in quadratic], dtype=np.int64)
+        qcol = np.array([v for _, v, _ in quadratic], dtype=np.int64)
+        qdata = np.array([b for _, _, b in quadratic], dtype=float)
+        self_loops = np.zeros(n, dtype=bool)
+        self_loops[qrow[qrow == qcol]] = True
+
+        removed = set()
+        changed = True
+        while changed:
+            changed = False
+
+            for label, idx, coef, sense, rhs in linear_constraints:
+                if label in removed:
+                    continue
+
+                lo, hi = coef * lower[idx], coef * upper[idx]
+                min_terms, max_terms = np.minimum(lo, hi), np.maximum(lo, hi)
+                min_activity, max_activity = min_terms.sum(), max_terms.sum()
+
+                # Always satisfied or never satisfiable
+                if ((sense == '<=' and max_activity <= rhs + ATOL) or (sense == '>=' and min_activity >= rhs - ATOL)
+                        or (sense == '==' and abs(max_activity - rhs) <= ATOL and abs(min_activity - rhs) <= ATOL)):
+                    removed.add(label)
+                    changed = True
+                    continue
+                if (sense in ('<=', '==') and min_activity > rhs + ATOL) or (sense in ('>=', '==') and max_activity < rhs - ATOL):
+                    if label not in self.infeasible_constraints:
+                        self.infeasible_constraints.append(label)
+                    continue
+
+                # Bounds implied on each variable by the activity of the others
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    new_lower, new_upper = lower[idx].copy(), upper[idx].copy()
+                    if sense in ('<=', '=='):
+                        bound = (rhs - (min_activity - min_terms)) / coef
+                        new_upper = np.where(coef > 0, np.minimum(new_upper, bound), new_upper)
+                        new_lower = np.where(coef < 0, np.maximum(new_lower, bound), new_lower)
+                    if sense in ('>=', '=='):
+                        bound = (rhs - (max_activity - max_terms)) / coef
+                        new_lower = np.where(coef > 0, np.maximum(new_lower, bound), new_lower)
+                        new_upper = np.where(coef < 0, np.minimum(new_upper, bound), new_upper)
+
+                new_upper = np.where(integral[idx], np.floor(new_upper + ATOL), new_upper)
+                new_lower = np.where(integral[idx], np.ceil(new_lower - ATOL), new_lower)
+
+                tighter = tightenable[idx] & ((new_upper < upper[idx] - ATOL) | (new_lower > lower[idx] + ATOL))
+                if tighter.any():
+                    upper[idx[tighter]] = new_upper[tighter]
+                    lower[idx[tighter]] = new_lower[tighter]
+                    changed = True
+
+            # Dominated variables: the objective gradient keeps its sign whatever the others do
+            free = (lower < upper - ATOL) & tightenable & ~locked & ~self_loops
+            q_lo, q_hi = qdata * lower[qcol], qdata * upper[qcol]
+            p_lo, p_hi = qdata * lower[qrow], qdata * upper[qrow]
+            gradient_min = linear + np.bincount(qrow, np.minimum(q_lo, q_hi), n) + np.bincount(qcol, np.minimum(p_lo, p_hi), n)
+            gradient_max = linear + np.bincount(qrow, np.maximum(q_lo, q_hi), n) + np.bincount(qcol, np.maximum(p_lo, p_hi), n)
+
+            to_lower = free & (gradient_min >= 0) & (down_locks == 0) & np.isfinite(lower)
+            to_upper = free & ~to_lower & (gradient_max <= 0) & (up_locks == 0) & np.isfinite(upper)
+            if to_lower.any() or to_upper.any():
+                upper[to_lower] = lower[to_lower]
+                lower[to_upper] = upper[to_upper]
+                changed = True
+
+        # Crossed bounds mean the constraints that produced them cannot all hold
+        crossed = lower > upper + ATOL
+        for label, idx, *_ in linear_constraints:
+            if crossed[idx].any() and label not in self.infeasible_constraints:
+                self.infeasible_constraints.append(label)
+        lower, upper = np.minimum(lower, upper), np.maximum(lower, upper)
+
+        # Build the reduced model
+        reduced = copy.deepcopy(cqm)
+        self.removed_constraints = [label for label, *_ in linear_constraints if label in removed]
+        for label in self.removed_constraints:
+            reduced.remove_constraint(label)
+
+        fixed = np.abs(upper - lower) <= ATOL
+        self.fixed = {variables[i]: (int(lower[i]) if integral[i] else lower[i]) for i in np.flatnonzero(fixed)}
+        reduced.fix_variables(self.fixed)
+
+        binary = np.array([vt is dimod.BINARY for vt in vartypes])
+        for i in np.flatnonzero(~fixed & tightenable & ~binary):
+            reduced.set_lower_bound(variables[i], lower[i])
+            reduced.set_upper_bound(variables[i], upper[i])
+
+        # Constraints left without variables are either trivially satisfied or already reported
+        for label, constraint in list(reduced.constraints.items()):
+            if not constraint.lhs.num_variables:
+                reduced.remove_constraint(label)
+                self.removed_constraints.append(label)
+
+        return reduced
+
+    def restore_samples(self, sampleset):
+        """Maps samples of the reduced model back to the original CQM.
+
+        Args:
+            sampleset (dimod.SampleSet): Samples of the reduced model
+
+        Returns:
+            dimod.SampleSet over the original variables, with energies and
+            feasibility computed on the original CQM
+        """
+        variables = list(self.original.variables)
+        samples = np.empty((max(len(sampleset), 1), len(variables)))
+
+        reduced_index = {v: i for i, v in enumerate(sampleset.variables)}
+        for j, v in enumerate(variables):
+            if v in self.fixed:
+                samples[:, j] = self.fixed[v]
+            else:
+                samples[:, j] = sampleset.record.sample[:, reduced_index[v]] if len(sampleset) else 0
+
+        return dimod.SampleSet.from_samples_cqm((samples, variables), self.original, info=dict(sampleset.info))
+
+def presolve_and_sample(sampler, cqm, **kwargs):
+    """Presolves the CQM, samples the reduced model and returns samples of the original.
+
+    If the presolve fixes every variable the sampler is not called.
+
+    Args:
+        sampler: Any sampler with a sample_cqm method (hybrid or local)
+        cqm (ConstrainedQuadraticModel): The model to solve
+        **kwargs: Passed on to sampler.sample_cqm
+
+    Returns:
+        dimod.SampleSet over the original variables
+    """
+    presolver = Presolver(cqm)
+    reduced = presolver.apply()
+
+    if not reduced.num_variables():
+        return presolver.restore_samples(dimod.SampleSet.from_samples(([[]], []), 'BINARY', [0]))
+
+    return presolver.restore_samples(sampler.sample_cqm(reduced, **kwargs))
@@ -0,0 +1,138 @@
+"""Cluster decomposition of large stock selection problems.
+
+A single CQM over thousands of stocks has a dense objective with millions
+of couplings. Instead the stocks are grouped by sector or by correlation,
+and each cluster is solved as its own small portfolio CQM, in parallel,
+with a share of the cardinality and budget constraints. Each cluster
+proposes a few more stocks than its share (oversampling), and a
+coordinating CQM over the proposed stocks, with the full constraints and
+the covariances across clusters, makes the final selection.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+
+import portfolio_model
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler, presolve_and_sample
+
+def correlation_clusters(variance, num_clusters):
+    """Groups stocks whose returns are correlated, by average-linkage clustering.
+
+    The distance between stocks i and j is sqrt(2*(1 - correlation[i][j])).
+
+    Args:
+        variance (2D array): Covariance matrix of the returns
+        num_clusters (int): Largest number of clusters
+
+    Returns:
+        Array with the cluster index (from 0) of each stock
+    """
+    variance = np.asarray(variance, dtype=float)
+    if len(variance) < 2:
+        return np.zeros(len(variance), dtype=np.int64)
+
+    std = np.sqrt(np.diag(variance))
+    std[std == 0] = 1
+    correlation = np.clip(variance / np.outer(std, std), -1, 1)
+
+    distance = np.sqrt(2 * (1 - correlation))
+    np.fill_diagonal(distance, 0)
+
+    tree = hierarchy.linkage(squareform(distance, checks=False), method='average')
+
+    return hierarchy.fcluster(tree, num_clusters, criterion='maxclust') - 1
+
+def sector_clusters(sectors):
+    '''Returns the cluster index (from 0) of each stock given its sector name'''
+
+    return np.unique(np.asarray(sectors), return_inverse=True)[1].ravel()
+
+def split_constraints(clusters, num_stocks_to_buy, budget, oversample=3):
+    """Splits the cardinality and budget constraints across clusters.
+
+    Each cluster gets a number of stocks proportional to its size (rounded up
+    after oversampling, at most the size of the cluster) and the budget
+    share of that number of stocks.
+
+    Returns:
+        Tuple (num_stocks, budgets) of arrays indexed by cluster
+    """
+    sizes = np.bincount(clusters)
+    share = oversample * num_stocks_to_buy * sizes / sizes.sum()
+    num_stocks = np.minimum(np.ceil(share).astype(np.int64), sizes)
+
+    return num_stocks, budget * num_stocks / num_stocks_to_buy
+
+def solve_portfolio(task):
+    """Solves one portfolio CQM given as arrays and returns the indices of the chosen stocks.
+
+    Args:
+        task (tuple): (num_stocks_to_buy, price, returns, budget, variance, local, seed)
+    """
+    num_stocks_to_buy, price, returns, budget, variance, local, seed = task
+
+    labels = list(range(len(price)))
+    cqm = portfolio_model.portfolio_cqm(labels, num_stocks_to_buy, price, returns, budget, variance)
+
+    if local:
+        sampleset = presolve_and_sample(LocalCQMSampler(), cqm, seed=seed)
+    else:
+        from dwave.system import LeapHybridCQMSampler
+        sampleset = presolve_and_sample(LeapHybridCQMSampler(), cqm, label='CQM cluster')
+
+    feasible = sampleset.filter(lambda d: d.is_feasible)
+    best = (feasible if len(feasible) else sampleset).first.sample
+
+    return np.array([v for v in labels if best[v] > 0.5], dtype=np.int64), bool(len(feasible))
+
+def decomposed_selection(num_stocks_to_buy, price, returns, budget, variance, clusters,
+                         oversample=3, workers=None, local=False, seed=None):
+    """Selects stocks by solving each cluster, then coordinating across clusters.
+
+    Args:
+        num_stocks_to_buy (int): Number of stocks to purchase
+        price, returns (array): Price and average monthly return of each stock
+        budget (float): Budget for purchase
+        variance (2D array): Covariance matrix of the returns
+        clusters (array): Cluster index of each stock (see correlation_clusters
+            and sector_clusters)
+        oversample (float): How many more stocks than its share each cluster proposes
+        workers (int): Number of worker processes for the cluster CQMs
+        local (bool): Solve on LocalCQMSampler instead of LeapHybridCQMSampler
+        seed (int): Random seed of the local sampler
+
+    Returns:
+        Tuple (chosen, feasible): indices of the chosen stocks and whether the
+        coordinating selection satisfies the constraints
+    """
+    price = np.asarray(price, dtype=float)
+    returns = np.asarray(returns, dtype=float)
+    variance = np.asarray(variance, dtype=float)
+    clusters = np.asarray(clusters, dtype=np.int64)
+
+    num_stocks, budgets = split_constraints(clusters, num_stocks_to_buy, budget, oversample)
+    members = [np.flatnonzero(clusters == c) for c in range(len(num_stocks))]
+    seeds = np.random.SeedSequence(seed).generate_state(len(members) + 1)
+
+    tasks = [(num_stocks[c], price[idx], returns[idx], budgets[c], variance[np.ix_(idx, idx)], local, seeds[c])
+             for c, idx in enumerate(members) if num_stocks[c]]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        proposals = list(executor.map(solve_portfolio, tasks))
+
+    active = [idx for c, idx in enumerate(members) if num_stocks[c]]
+    candidates = np.unique(np.concatenate([idx[chosen] for idx, (chosen, _) in zip(active, proposals)]))
+
+    # Coordinating pass: the full constraints over the proposed stocks, with the covariances across clusters
+    chosen, feasible = solve_portfolio((num_stocks_to_buy, price[candidates], returns[candidates], budget,
+                                        variance[np.ix_(candidates, candidates)], local, seeds[-1]))
+
+    return candidates[chosen], feasible
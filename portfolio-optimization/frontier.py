@@ -0,0 +1,198 @@
+"""Efficient frontier of the stock selection problem.
+
+The portfolio model is assembled once as arrays. Each frontier point only
+rescales the risk term by its risk-aversion weight and moves the budget
+right-hand side, then it is solved on the local CQM sampler. Points sharing
+a budget form a chain solved in one worker process, in increasing risk
+aversion, each point warm-started from the best portfolio of the previous
+one. Chains run concurrently.
+
+Usage:
+    python frontier.py frontier.csv [--budgets 40 60 80] [--risk-aversions 0 0.5 1 2 4]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import portfolio_model
+import utilities
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler
+from local_solvers.cqm import EQ, LE
+
+def frontier_model(stockcodes, num_stocks_to_buy, price, returns, variance):
+    """Assembles the parts of the portfolio model shared by every frontier point.
+
+    The risk term is the one of portfolio_model.portfolio_objective, the sum
+    of variance[i][j] over the pairs i < j of chosen stocks, so each
+    frontier point is the model the stock selection scripts solve, with the
+    risk term weighted by its risk aversion.
+
+    Returns:
+        Dictionary with the labels, returns, price and the risk term as linear
+        vector and symmetric coupling matrix, plus the constraint rows in the
+        format of local_solvers.cqm.cqm_arrays
+    """
+    price = np.asarray(price, dtype=float)
+    n = len(stockcodes)
+    variables = [f's_{stk}' for stk in stockcodes]
+
+    risk = portfolio_model.portfolio_objective(variables, np.zeros(n), variance)
+    risk_linear, (irow, icol, qdata), _ = risk.to_numpy_vectors(variable_order=variables)
+    risk_coupling = sparse.coo_matrix((np.concatenate((qdata, qdata)), (np.concatenate((irow, icol)),
+                                                                          np.concatenate((icol, irow)))),
+                                      shape=(n, n))
+
+    return {'stockcodes': list(stockcodes), 'variables': variables,
+            'returns': np.asarray(returns, dtype=float), 'price': price,
+            'risk_linear': np.asarray(risk_linear, dtype=float), 'risk_coupling': risk_coupling.tocsc(),
+            'labels': ['choose k stocks', 'budget_limitation'],
+            'matrix': sparse.csc_matrix(np.vstack((np.ones(n), price))),
+            'sense': np.array([EQ, LE], dtype=np.int64),
+            'num_stocks_to_buy': num_stocks_to_buy}
+
+def point_arrays(model, risk_aversion, budget):
+    '''Returns the cqm_arrays of one frontier point: -returns + risk_aversion*risk, cost <= budget'''
+
+    return {'variables': model['variables'],
+            'linear': -model['returns'] + risk_aversion * model['risk_linear'],
+            'coupling': risk_aversion * model['risk_coupling'],
+            'offset': 0.0,
+            'labels': model['labels'], 'matrix': model['matrix'], 'sense': model['sense'],
+            'rhs': np.array([model['num_stocks_to_buy'], budget], dtype=float)}
+
+def evaluate(model, samples, budget):
+    '''Returns the returns, risk, cost and feasibility of each row of samples'''
+
+    x = np.asarray(samples, dtype=float)
+
+    returns = x @ model['returns']
+    risk = x @ model['risk_linear'] + 0.5 * np.einsum('ij,ij->i', x, x @ model['risk_coupling'])
+    cost = x @ model['price']
+    feasible = (x.sum(axis=1) == model['num_stocks_to_buy']) & (cost <= budget + 1e-9)
+
+    return returns, risk, cost, feasible
+
+def solve_chain(task):
+    """Solves the frontier points of one budget, warm-starting each from the previous one.
+
+    Args:
+        task (tuple): (model, budget, risk_aversions, seed, sampler_parameters)
+
+    Returns:
+        List of rows (risk_aversion, budget, stocks, returns, risk, cost, feasible)
+    """
+    model, budget, risk_aversions, seed, parameters = task
+
+    sampler = LocalCQMSampler()
+    rng = np.random.default_rng(seed)
+
+    rows = []
+    initial_states = None
+    for risk_aversion in sorted(risk_aversions):
+        arrays = point_arrays(model, risk_aversion, budget)
+        samples, _ = sampler.sample_arrays(arrays, seed=rng.integers(2**32), initial_states=initial_states,
+                                           **parameters)
+
+        # Best sample: feasible first, then lowest objective
+        returns, risk, cost, feasible = evaluate(model, samples, budget)
+        best = np.lexsort((risk_aversion * risk - returns, ~feasible))[0]
+
+        stocks = ' '.join(stk for stk, chosen in zip(model['stockcodes'], samples[best]) if chosen)
+        rows.append((risk_aversion, budget, stocks, returns[best], risk[best], cost[best], bool(feasible[best])))
+
+        initial_states = samples[best:best+1]
+
+    return rows
+
+def frontier_sweep(model, risk_aversions, budgets, workers=None, seed=None, **parameters):
+    """Solves every (risk aversion, budget) point of the frontier.
+
+    Args:
+        model (dict): As returned by frontier_model
+        risk_aversions (list): Weights of the risk term
+        budgets (list): Budgets, one chain of warm-started points each
+        workers (int): Number of worker processes
+        seed (int): Random seed
+        **parameters: Passed on to LocalCQMSampler.sample_arrays
+
+    Returns:
+        pandas.DataFrame with one row per point and columns risk_aversion,
+        budget, stocks, returns, risk, cost and feasible
+    """
+    seeds = np.random.SeedSequence(seed).generate_state(len(budgets))
+    tasks = [(model, budget, list(risk_aversions), chain_seed, parameters) for budget, chain_seed in zip(budgets, seeds)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chains = list(executor.map(solve_chain, tasks))
+
+    columns = ['risk_aversion', 'budget', 'stocks', 'returns', 'risk', 'cost', 'feasible']
+
+    return pd.DataFrame([row for chain in chains for row in chain], columns=columns)
+
+def pareto_front(points):
+    """Returns the feasible portfolios not dominated in (higher returns, lower risk).
+
+    Args:
+        points (pandas.DataFrame): As returned by frontier_sweep
+
+    Returns:
+        pandas.DataFrame of the Pareto set, one row per portfolio, by increasing risk
+    """
+    feasible = points[points['feasible']].drop_duplicates('stocks')
+    feasible = feasible.sort_values(['risk', 'returns'], ascending=[True, False])
+
+    # Along increasing risk, a portfolio is kept only if it beats every less risky one
+    returns = feasible['returns'].to_numpy()
+    previous_best = np.maximum.accumulate(np.concatenate(([-np.inf], returns[:-1])))
+
+    return feasible[returns > previous_best].reset_index(drop=True)
+
+def efficient_frontier(stockcodes, num_stocks_to_buy, price, returns, variance, risk_aversions, budgets,
+                       workers=None, seed=None, **parameters):
+    '''Returns the Pareto set of the stock selection over the risk aversions and budgets'''
+
+    model = frontier_model(stockcodes, num_stocks_to_buy, price, returns, variance)
+
+    return pareto_front(frontier_sweep(model, risk_aversions, budgets, workers, seed, **parameters))
+
+## ------- Main program -------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Efficient frontier of the stock selection')
+    parser.add_argument('output', help='output table (.csv or .parquet)')
+    parser.add_argument('--num-stocks', type=int, default=2, help='number of stocks to select')
+    parser.add_argument('--budgets', type=float, nargs='+', default=[40, 60, 80, 100], help='budgets to sweep')
+    parser.add_argument('--risk-aversions', type=float, nargs='+', default=[0, 0.25, 0.5, 1, 2, 4, 8],
+                        help='weights of the risk term to sweep')
+    parser.add_argument('--data', default=utilities.DATA_FILE,
+                        help='price history of the stocks (CSV or Parquet, see utilities.py)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        parser.error("no price history at {}, pass it with --data".format(args.data))
+
+    # 10 stocks used in this program
+    stockcodes = ["T", "SFL", "PFE", "XOM", "MO", "VZ", "IBM", "TSLA", "GILD", "GE"]
+
+    price, returns, variance = utilities.get_stock_info(stockcodes, args.data)
+
+    frontier = efficient_frontier(stockcodes, args.num_stocks, price, returns, variance,
+                                  args.risk_aversions, args.budgets, args.workers, args.seed)
+
+    if args.output.endswith('.parquet'):
+        frontier.to_parquet(args.output, index=False)
+    else:
+        frontier.to_csv(args.output, index=False)
+
+    print(frontier.to_string(index=False))
@@ -0,0 +1,183 @@
+"""Matrix-form builder of the portfolio CQM.
+
+The objective and constraints are built directly from numpy arrays instead
+of summing symbolic Binary expressions, so the model of a whole stock
+universe builds in one shot.
+
+The covariance matrix can be sparsified first (sparsify_covariance), so the
+objective only couples strongly related stocks; covariance_report measures
+what that does to the risk term of the chosen portfolio.
+"""
+
+import numpy as np
+from dimod import BinaryQuadraticModel, ConstrainedQuadraticModel
+from scipy import sparse
+
+# Ways to sparsify the covariance matrix, see sparsify_covariance
+SPARSIFY_METHODS = ('threshold', 'shrinkage', 'knn')
+
+def correlation_matrix(variance):
+    '''Returns the correlation matrix and standard deviations of a covariance matrix'''
+
+    std = np.sqrt(np.diag(variance))
+    safe = np.where(std > 0, std, 1)
+
+    return variance / np.outer(safe, safe), std
+
+def sparsify_covariance(variance, method='threshold', parameter=None):
+    """Drops the weak entries of a covariance matrix.
+
+    Methods:
+        - 'threshold': keep the pairs with |correlation| >= parameter (default 0.3)
+        - 'shrinkage': soft-threshold the correlations, shrinking every
+          |correlation| by parameter (default 0.3) and dropping those below it
+        - 'knn': keep, for each stock, its parameter (default 5) most correlated
+          stocks; a pair is kept if either stock picks the other
+
+    The diagonal is always kept.
+
+    Args:
+        variance (2D array): Covariance matrix of the returns
+        method (str): One of SPARSIFY_METHODS
+        parameter (float): Threshold or number of neighbours
+
+    Returns:
+        scipy.sparse.csr_matrix, symmetric
+    """
+    variance = np.asarray(variance, dtype=float)
+    correlation, std = correlation_matrix(variance)
+    magnitude = np.abs(correlation)
+    np.fill_diagonal(magnitude, np.inf)
+
+    if method == 'threshold':
+        keep = magnitude >= (0.3 if parameter is None else parameter)
+        approx = np.where(keep, variance, 0)
+
+    elif method == 'shrinkage':
+        shrink = 0.3 if parameter is None else parameter
+        shrunk = np.sign(correlation) * np.maximum(magnitude - shrink, 0)
+        approx = shrunk * np.outer(std, std)
+        np.fill_diagonal(approx, np.diag(variance))
+
+    elif method == 'knn':
+        k = int(5 if parameter is None else parameter)
+        k = min(k, len(variance) - 1)
+        neighbours = np.argpartition(-magnitude, k, axis=1)[:, :k+1]
+        keep = np.zeros(variance.shape, dtype=bool)
+        keep[np.arange(len(variance))[:, np.newaxis], neighbours] = True
+        approx = np.where(keep | keep.T, variance, 0)
+
+    else:
+        raise ValueError("unknown method {!r}, expected one of {}".format(method, SPARSIFY_METHODS))
+
+    return sparse.csr_matrix(approx)
+
+def covariance_report(variance, approx, selections=()):
+    """Measures how well a sparsified covariance matrix approximates the full one.
+
+    Both are compared on what portfolio_objective uses: the covariances of
+    distinct stocks (the strict upper triangle), and for a selection x the
+    risk term sum over i<j of variance[i][j]*x[i]*x[j].
+
+    Args:
+        variance (2D array): Full covariance matrix
+        approx (2D array or sparse matrix): Sparsified covariance matrix
+        selections (list): Stock selections to check, as 0/1 vectors
+
+    Returns:
+        Dictionary with the number and fraction of couplings kept, the relative
+        Frobenius error of the couplings, and for each selection the risk
+        term with both matrices and its relative error
+    """
+    upper = np.triu(np.asarray(variance, dtype=float), 1)
+    approx_upper = sparse.triu(sparse.csr_matrix(approx), 1, format='csr')
+    n = len(upper)
+
+    couplings = (approx_upper != 0).sum()
+    difference = upper - approx_upper.toarray()
+
+    report = {'couplings': int(couplings),
+              'fraction_kept': float(couplings / max(n * (n - 1) // 2, 1)),
+              'frobenius_error': float(np.linalg.norm(difference) / max(np.linalg.norm(upper), 1e-300)),
+              'portfolios': []}
+
+    for x in np.atleast_2d(np.asarray(selections, dtype=float)) if len(selections) else []:
+        exact, estimate = x @ upper @ x, x @ (approx_upper @ x)
+        report['portfolios'].append({'risk': float(exact), 'approx_risk': float(estimate),
+                                     'relative_error': float(abs(estimate - exact) / max(abs(exact), 1e-300))})
+
+    return report
+
+def portfolio_objective(labels, returns, variance=None):
+    """Returns the portfolio objective as a BinaryQuadraticModel.
+
+    The objective is -sum(returns[i]*x[i]) + sum over i<j of variance[i][j]*x[i]*x[j],
+    built from the upper triangle of the covariance matrix in one step.
+
+    Args:
+        labels (list): Variable label of each stock
+        returns (array): Average monthly return of each stock
+        variance (2D array or sparse matrix): Covariance matrix of the returns,
+            None for returns only. A sparse matrix only adds couplings for its
+            stored entries
+
+    Returns:
+        BinaryQuadraticModel
+    """
+    linear = -np.asarray(returns, dtype=float)
+
+    if variance is None:
+        return linear_constraint(linear, labels)
+
+    if sparse.issparse(variance):
+        upper = sparse.triu(variance, 1, format='coo')
+        return BinaryQuadraticModel.from_numpy_vectors(linear, (upper.row, upper.col, upper.data), 0, 'BINARY',
+                                                       variable_order=list(labels))
+
+    objective = BinaryQuadraticModel(np.triu(np.asarray(variance, dtype=float), 1), 'BINARY')
+    objective.add_linear_from_array(linear)
+    objective.relabel_variables(dict(enumerate(labels)))
+
+    return objective
+
+def linear_constraint(coefficients, labels):
+    '''Returns the left-hand side BQM of a linear constraint'''
+
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+
+    return BinaryQuadraticModel.from_numpy_vectors(np.asarray(coefficients, dtype=float), empty, 0, 'BINARY',
+                                                   variable_order=labels)
+
+def portfolio_cqm(labels, num_stocks_to_buy, price, returns, budget, variance=None):
+    """Builds the portfolio CQM from numpy arrays.
+    Requirements:
+        Objectives:
+            - Maximize returns
+            - Minimize variance (when variance is given)
+        Constraints:
+            - Choose exactly num_stocks_to_buy stocks
+            - Spend at most budget on purchase
+
+    Args:
+        labels (list): Variable label of each stock
+        num_stocks_to_buy (int): Number of stocks to purchase
+        price (array): Current price of each stock
+        returns (array): Average monthly return of each stock
+        budget (float): Budget for purchase
+        variance (2D array or sparse matrix): Covariance matrix of the returns
+
+    Returns:
+        cqm (ConstrainedQuadraticModel)
+    """
+    labels = list(labels)
+
+    cqm = ConstrainedQuadraticModel()
+
+    cqm.set_objective(portfolio_objective(labels, returns, variance))
+
+    cqm.add_constraint_from_model(linear_constraint(np.ones(len(labels)), labels), '==', num_stocks_to_buy,
+                                  label='choose k stocks', copy=False)
+    cqm.add_constraint_from_model(linear_constraint(price, labels), '<=', budget,
+                                  label='budget_limitation', copy=False)
+
+    return cqm
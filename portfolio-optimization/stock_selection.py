@@ -12,10 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import os
+import sys
+
+import portfolio_model
 import utilities
 from dimod import ConstrainedQuadraticModel, Binary
 from dwave.system import LeapHybridCQMSampler
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler, presolve_and_sample
+
 def define_variables(stockcodes):
     """Define the variables to be used for the CQM.
     Args:
@@ -55,29 +64,37 @@ def define_cqm(stocks, num_stocks_to_buy, returns):
     # Add a constraint to choose exactly num_stocks_to_buy stocks
     cqm.add_constraint(sum(stocks) == num_stocks_to_buy, label='choose k stocks' )
     
-    # Add a constraint that the cost of the purchased stocks is less than or equal to the budget
-    cqm.add_constraint(sum(stocks[i]*price[i] for i in range(len(stocks))) <= budget, label='budget_limitation')
-
-    # Add an objective function maximize returns
-    cqm.set_objective(sum(-returns[i]+ stocks[i] for i in range(len(stocks))))
+    # Add an objective function maximize returns: -returns[i]*stocks[i], built from the returns array in one go
+    labels = [stock.variables[0] for stock in stocks]
+    cqm.set_objective(portfolio_model.portfolio_objective(labels, returns))
 
     return cqm
 
-def sample_cqm(cqm):
+def sample_cqm(cqm, local=False):
+    """Presolves the CQM and samples the reduced model on LeapHybridCQMSampler, or on LocalCQMSampler when local is True"""
 
-    sampler = LeapHybridCQMSampler()
-    sampleset = sampler.sample_cqm(cqm, time_limit=5, label = 'CQM problem')
+    sampler = LocalCQMSampler() if local else LeapHybridCQMSampler()
+    sampleset = presolve_and_sample(sampler, cqm, time_limit=5, label = 'CQM problem')
 
     return sampleset
 
 
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default=utilities.DATA_FILE,
+                        help='price history of the stocks (CSV or Parquet, see utilities.py)')
+    parser.add_argument('--local', action='store_true', help='solve on the local CQM sampler instead of Leap')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        parser.error("no price history at {}, pass it with --data".format(args.data))
+
     # 10 stocks used in this program
     stockcodes=["T", "SFL", "PFE", "XOM", "MO", "VZ", "IBM", "TSLA", "GILD", "GE"]
 
     # Compute relevant statistics like price, average returns, and covariance
-    price, returns, variance = utilities.get_stock_info()
+    price, returns, variance = utilities.get_stock_info(stockcodes, args.data)
 
     # Number of stocks to buy
     num_stocks_to_buy = 2
@@ -89,7 +106,7 @@ if __name__ == '__main__':
     cqm = define_cqm(stocks, num_stocks_to_buy, returns)
 
     # Run CQM on hybrid solver
-    sampleset = sample_cqm(cqm)
+    sampleset = sample_cqm(cqm, args.local)
     
     # Process and print solution
     print("\nPart 1 solution:\n")
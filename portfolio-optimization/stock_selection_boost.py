@@ -12,10 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import os
+import sys
+
+import decomposition
+import portfolio_model
 import utilities
-from dimod import ConstrainedQuadraticModel, Binary
+from dimod import Binary
 from dwave.system import LeapHybridCQMSampler
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import LocalCQMSampler, presolve_and_sample
+
 def define_variables(stockcodes):
     """Define the variables to be used for the CQM.
     Args:
@@ -52,44 +62,49 @@ def define_cqm(stocks, num_stocks_to_buy, price, returns, budget, variance):
                 where returns[i] is the average returns for stocks[i]
         budget (float):
             Budget for purchase
-        variance (2D numpy array):
+        variance (2D numpy array or scipy sparse matrix):
             Entry [i][j] is the variance between stocks i and j
         
     Returns:
         cqm (ConstrainedQuadraticModel)
     """
 
-    cqm = ConstrainedQuadraticModel()
-    
-    cqm.add_constraint(sum(stocks) == num_stocks_to_buy, label='choose k stocks' )  
-    cqm.add_constraint(sum(stocks[i]*price[i] for i in range(len(stocks))) <= budget, label='budget_limitation')
-    
-    cqm.set_objective(sum(-returns[i]+stocks[i] for i in range(len(stocks))))
+    # Variance is the quadratic term variance[i][j]*stock[i]*stock[j], built from the covariance matrix in one go
+    labels = [stock.variables[0] for stock in stocks]
+    cqm = portfolio_model.portfolio_cqm(labels, num_stocks_to_buy, price, returns, budget, variance)
 
-    # Add an objective function maximize returns AND minimize variance
-    ##Variance is computed as a quadratic term: variance[i][j]*stock[i]*stock[j]
-    
-    ob_1 = sum(-returns[i]+stocks[i] for i in range(len(stocks)))
-    ob_2 = sum(variance[i][j]*stocks[i]*stocks[j] for i in range(len(stocks)) for j in range(i+1, len(stocks)))
-
-    cqm.set_objective(ob_1 + ob_2)
-    
     return cqm
 
-def sample_cqm(cqm):
+def sample_cqm(cqm, local=False):
+    """Presolves the CQM and samples the reduced model on LeapHybridCQMSampler, or on LocalCQMSampler when local is True"""
 
-    sampler = LeapHybridCQMSampler()
-    sampleset = sampler.sample_cqm(cqm, time_limit=5, label = 'CQM problem')
+    sampler = LocalCQMSampler() if local else LeapHybridCQMSampler()
+    sampleset = presolve_and_sample(sampler, cqm, time_limit=5, label = 'CQM problem')
 
 
     return sampleset
 
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default=utilities.DATA_FILE,
+                        help='price history of the stocks (CSV or Parquet, see utilities.py)')
+    parser.add_argument('--local', action='store_true', help='solve on the local CQM sampler instead of Leap')
+    parser.add_argument('--clusters', type=int, default=0,
+                        help='solve per cluster of correlated stocks, then coordinate (0 solves one CQM)')
+    parser.add_argument('--sparsify', choices=portfolio_model.SPARSIFY_METHODS,
+                        help='drop weak covariances from the variance term')
+    parser.add_argument('--sparsity', type=float, default=None,
+                        help='correlation threshold, or number of neighbours for knn')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        parser.error("no price history at {}, pass it with --data".format(args.data))
+
     # 10 stocks used in this program
     stockcodes = ["T", "SFL", "PFE", "XOM", "MO", "VZ", "IBM", "TSLA", "GILD", "GE"]
 
-    price, returns, variance = utilities.get_stock_info()
+    price, returns, variance = utilities.get_stock_info(stockcodes, args.data)
 
     # Number of stocks to select
     num_stocks_to_buy = 2
@@ -97,15 +112,37 @@ if __name__ == '__main__':
     # Set the budget
     budget = 40
 
-    # Add binary variables for stocks
-    stocks = define_variables(stockcodes)
+    # Large universes: solve clusters of correlated stocks separately, then rebalance across them
+    if args.clusters:
+        clusters = decomposition.correlation_clusters(variance, args.clusters)
+        chosen, feasible = decomposition.decomposed_selection(num_stocks_to_buy, price, returns, budget, variance,
+                                                              clusters, local=args.local)
 
-    # Build CQM
-    cqm = define_cqm(stocks, num_stocks_to_buy, price, returns, budget, variance)
+        print("\nPart 3 solution (decomposed):\n")
+        suffix = "" if feasible else " (constraints not satisfied)"
+        print("Stocks chosen:", str([stockcodes[i] for i in chosen]) + suffix)
 
-    # Run CQM on hybrid solver
-    sampleset = sample_cqm(cqm)
-    
-    # Process and print solution
-    print("\nPart 3 solution:\n")
-    utilities.process_sampleset(sampleset, stockcodes)
+    else:
+        # Add binary variables for stocks
+        stocks = define_variables(stockcodes)
+
+        # Optionally keep only the strong covariances, so the model has fewer couplings
+        risk = variance
+        if args.sparsify:
+            risk = portfolio_model.sparsify_covariance(variance, args.sparsify, args.sparsity)
+
+        # Build CQM
+        cqm = define_cqm(stocks, num_stocks_to_buy, price, returns, budget, risk)
+
+        # Run CQM on hybrid solver
+        sampleset = sample_cqm(cqm, args.local)
+
+        # Process and print solution
+        print("\nPart 3 solution:\n")
+        chosen = utilities.process_sampleset(sampleset, stockcodes)
+
+        if args.sparsify and chosen is not None:
+            report = portfolio_model.covariance_report(variance, risk, [[stk in chosen for stk in stockcodes]])
+            print("Couplings kept:", report['couplings'], "({:.1%})".format(report['fraction_kept']))
+            print("Portfolio risk: {risk:.6g} (sparsified model: {approx_risk:.6g}, "
+                  "relative error {relative_error:.2%})".format(**report['portfolios'][0]))
@@ -0,0 +1,145 @@
+"""Price data and statistics for the portfolio optimization scripts.
+
+The price history is a CSV or Parquet table with one row per month (in
+chronological order, an optional date column first) and one column of
+closing prices per stock code:
+
+    date,T,SFL,PFE,...
+    2020-01-31,38.21,10.83,39.01,...
+
+The derived statistics are cached on disk, keyed by a hash of the file
+contents and the selected stocks, so repeated runs on the same data only
+read the cache.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default price history, next to this module
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'basic_data.csv')
+
+# Where the derived statistics are cached
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Bump when the statistics change, so old cache entries are not reused
+CACHE_VERSION = 1
+
+def load_prices(filename=DATA_FILE, stockcodes=None):
+    """Loads the price history of a CSV or Parquet file.
+
+    Args:
+        filename (str): Price table (.parquet, or CSV for anything else)
+        stockcodes (list): Stock codes to keep, in this order (all by default)
+
+    Returns:
+        Tuple (stockcodes, prices) where prices is a (months x stocks) numpy array
+    """
+    if filename.endswith('.parquet'):
+        df = pd.read_parquet(filename)
+    else:
+        df = pd.read_csv(filename)
+
+    df = df.select_dtypes('number')
+    if stockcodes is not None:
+        missing = [stk for stk in stockcodes if stk not in df.columns]
+        if missing:
+            raise ValueError("no price history for {} in {}".format(missing, filename))
+        df = df[list(stockcodes)]
+
+    # Fill gaps with the last known price, then the first one for leading gaps
+    df = df.ffill().bfill()
+
+    return list(df.columns), df.to_numpy(dtype=float)
+
+def stock_statistics(prices):
+    """Computes the statistics used by the portfolio models.
+
+    Args:
+        prices (2D numpy array): Entry [t][i] is the price of stock i in month t
+
+    Returns:
+        Tuple (price, returns, variance): latest price of each stock, average
+        monthly return of each stock and covariance matrix of the monthly returns
+    """
+    monthly_returns = prices[1:] / prices[:-1] - 1
+
+    price = prices[-1]
+    returns = monthly_returns.mean(axis=0)
+    variance = np.cov(monthly_returns, rowvar=False).reshape(len(price), len(price))
+
+    return price, returns, variance
+
+def cache_key(filename, stockcodes):
+    '''Returns the hash identifying the statistics of a price file and stock selection'''
+
+    digest = hashlib.sha1()
+    digest.update(str(CACHE_VERSION).encode())
+    digest.update(repr(None if stockcodes is None else list(stockcodes)).encode())
+
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def get_stock_info(stockcodes=None, filename=DATA_FILE, cache_dir=CACHE_DIR):
+    """Returns price, average monthly returns and covariance of the stocks.
+
+    Args:
+        stockcodes (list): Stock codes, in the order of the returned arrays
+            (all the stocks of the file by default)
+        filename (str): Price history (CSV or Parquet)
+        cache_dir (str): Directory of the statistics cache, None to disable it
+
+    Returns:
+        Tuple (price, returns, variance) of numpy arrays, see stock_statistics
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError("no price history at {}: pass the price table of the stocks "
+                                "(CSV or Parquet, see utilities.py) with --data".format(filename))
+
+    if cache_dir is None:
+        return stock_statistics(load_prices(filename, stockcodes)[1])
+
+    cache_file = os.path.join(cache_dir, 'stock_info_{}.npz'.format(cache_key(filename, stockcodes)))
+
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as cached:
+            return cached['price'], cached['returns'], cached['variance']
+
+    price, returns, variance = stock_statistics(load_prices(filename, stockcodes)[1])
+
+    # Write then rename, so concurrent runs never read a partial file
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = '{}.{}.npz'.format(cache_file[:-4], os.getpid())
+    np.savez(partial, price=price, returns=returns, variance=variance)
+    os.replace(partial, cache_file)
+
+    return price, returns, variance
+
+def process_sampleset(sampleset, stockcodes):
+    """Prints the stocks chosen in the best feasible solution.
+
+    Args:
+        sampleset (dimod.SampleSet): Samples of the portfolio CQM
+        stockcodes (list): Stock codes, the variables are named 's_{stk}'
+
+    Returns:
+        List of the chosen stock codes, None when no sample is feasible
+    """
+    feasible = sampleset.filter(lambda d: d.is_feasible)
+
+    if not len(feasible):
+        print("No feasible solution found.")
+        return None
+
+    sample = feasible.first.sample
+    chosen = [stk for stk in stockcodes if sample[f's_{stk}'] > 0.5]
+
+    print("Stocks chosen:", chosen)
+    print("Energy:", feasible.first.energy)
+
+    return chosen
@@ -0,0 +1,246 @@
+"""Exact structural-balance presolve for the friends and enemies problem.
+
+Every edge (i, j) with weight w costs w when i and j end up in different
+sets (w > 0 friendly, w < 0 hostile), which is how get_bqm builds the BQM
+(linear w on both people, interaction -2*w). The presolve removes what can
+be solved exactly and leaves the frustrated core for the sampler:
+
+    - a person whose strongest relationship outweighs all their others
+      together (in particular anyone with one relationship) follows that
+      relationship, so they are contracted into the other person
+    - a person with exactly two relationships is replaced by one equivalent
+      relationship between their two contacts (series reduction), which
+      collapses chains and tree-like parts
+    - connected components are independent, and a component without
+      frustrated cycles (balanced) is solved directly by 2-colouring
+
+Contracting every friendly component is not exact in general (breaking a
+friendship can pay off when many enmities disagree with it), so friendly
+edges are only contracted when the dominance rule above holds.
+
+Example:
+    presolver = BalancePresolver(num_nodes, row, col, signs)
+    core_bqm = presolver.core_bqm()
+    ... sample core_bqm ...
+    solution = presolver.expand(core_solution)
+"""
+
+from collections import deque
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+import social_graph
+
+class BalancePresolver:
+    """Reduces a signed graph to its frustrated core.
+
+    Args:
+        num_nodes (int): Number of people
+        row, col (array): Endpoints of each edge
+        weights (array): Weight of each edge, positive for friendly and
+            negative for hostile (the relationship signs of get_bqm)
+    """
+
+    def __init__(self, num_nodes, row, col, weights):
+        self.num_nodes = int(num_nodes)
+        self.offset = 0.0
+        self.steps = []
+
+        row, col = np.asarray(row, dtype=np.int64), np.asarray(col, dtype=np.int64)
+        weights = np.asarray(weights, dtype=float)
+
+        # Merge parallel edges and drop self-loops and zero weights
+        keep = row != col
+        lo, hi = np.minimum(row, col)[keep], np.maximum(row, col)[keep]
+        pairs, inverse = np.unique(lo * self.num_nodes + hi, return_inverse=True)
+        merged = np.bincount(inverse.ravel(), weights[keep], len(pairs))
+        nonzero = merged != 0
+
+        self.row = pairs[nonzero] // self.num_nodes
+        self.col = pairs[nonzero] % self.num_nodes
+        self.weights = merged[nonzero]
+
+        self.reduce()
+
+    def candidates(self):
+        '''Returns the people a local reduction may apply to (at most two relationships, or a dominant one)'''
+
+        n = self.num_nodes
+        nodes = np.concatenate((self.row, self.col))
+        magnitude = np.abs(np.tile(self.weights, 2))
+
+        degree = np.bincount(nodes, minlength=n)
+        total = np.bincount(nodes, magnitude, minlength=n)
+        strongest = np.zeros(n)
+        np.maximum.at(strongest, nodes, magnitude)
+
+        return np.flatnonzero((degree <= 2) | (2 * strongest >= total))
+
+    def reduce(self):
+        '''Applies the local reductions until none applies, then solves the balanced components'''
+
+        queue = deque(self.candidates())
+
+        if len(queue):
+            adjacency = [dict() for _ in range(self.num_nodes)]
+            for u, v, w in zip(self.row.tolist(), self.col.tolist(), self.weights.tolist()):
+                adjacency[u][v] = w
+                adjacency[v][u] = w
+
+            alive = np.ones(self.num_nodes, dtype=bool)
+            while queue:
+                v = queue.popleft()
+                if alive[v]:
+                    queue.extend(self.reduce_node(v, adjacency, alive))
+
+            edges = [(u, v, w) for u in range(self.num_nodes) for v, w in adjacency[u].items() if u < v]
+            self.row = np.array([u for u, _, _ in edges], dtype=np.int64)
+            self.col = np.array([v for _, v, _ in edges], dtype=np.int64)
+            self.weights = np.array([w for _, _, w in edges], dtype=float)
+            self.core_nodes = np.flatnonzero(alive)
+        else:
+            self.core_nodes = np.arange(self.num_nodes)
+
+        self.solve_balanced_components()
+
+    def reduce_node(self, v, adjacency, alive):
+        """Removes node v if a local reduction applies.
+
+        Returns:
+            The nodes whose reductions may have changed
+        """
+        neighbours = adjacency[v]
+
+        if not neighbours:
+            alive[v] = False
+            self.steps.append(('free', v))
+            return []
+
+        u, w = max(neighbours.items(), key=lambda item: abs(item[1]))
+
+        # Dominant relationship: v follows u (same set if friendly, the other one if hostile)
+        if 2 * abs(w) >= sum(abs(x) for x in neighbours.values()):
+            flip = w < 0
+            self.offset += min(0.0, w)
+            changed = [u]
+
+            for k, x in list(neighbours.items()):
+                self.remove_edge(adjacency, v, k)
+                if k != u:
+                    # [x_v != x_k] is [x_u != x_k], or its complement when v is opposite u
+                    self.offset += x if flip else 0.0
+                    self.add_edge(adjacency, u, k, -x if flip else x)
+                    changed.append(k)
+
+            alive[v] = False
+            self.steps.append(('follow', v, u, flip))
+            return changed
+
+        # Series reduction: v only links u and k, replace it by one equivalent edge
+        if len(neighbours) == 2:
+            (u, a), (k, b) = neighbours.items()
+            self.remove_edge(adjacency, v, u)
+            self.remove_edge(adjacency, v, k)
+
+            same = min(0.0, a + b)
+            self.offset += same
+            self.add_edge(adjacency, u, k, min(a, b) - same)
+
+            alive[v] = False
+            self.steps.append(('series', v, u, k, a, b))
+            return [u, k]
+
+        return []
+
+    @staticmethod
+    def remove_edge(adjacency, u, v):
+        del adjacency[u][v]
+        del adjacency[v][u]
+
+    @staticmethod
+    def add_edge(adjacency, u, v, w):
+        '''Adds w to the weight of edge (u, v), removing it when the weight cancels'''
+
+        w += adjacency[u].get(v, 0.0)
+
+        if w == 0:
+            adjacency[u].pop(v, None)
+            adjacency[v].pop(u, None)
+        else:
+            adjacency[u][v] = w
+            adjacency[v][u] = w
+
+    def solve_balanced_components(self):
+        """Solves the components of the core without frustrated cycles.
+
+        Each person is split into two copies (set 0 and set 1); a friendly
+        edge links equal copies and a hostile edge opposite ones. A component
+        is balanced exactly when the two copies of its people never connect.
+        """
+        n = self.num_nodes
+        core = np.zeros(n, dtype=bool)
+        core[self.core_nodes] = True
+
+        friendly = self.weights > 0
+        a = np.concatenate((self.row, self.row + n))
+        b = np.concatenate((np.where(friendly, self.col, self.col + n), np.where(friendly, self.col + n, self.col)))
+        lifted = sparse.coo_matrix((np.ones(len(a)), (a, b)), shape=(2 * n, 2 * n))
+        _, lifted_labels = connected_components(lifted, directed=False)
+
+        graph = sparse.coo_matrix((np.ones(len(self.row)), (self.row, self.col)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+
+        balanced = np.ones(labels.max() + 1, dtype=bool)
+        np.logical_and.at(balanced, labels, lifted_labels[:n] != lifted_labels[n:])
+
+        # Set 0 for the copy sharing the lifted component of the first person of the component
+        first = np.full(labels.max() + 1, n)
+        np.minimum.at(first, labels, np.arange(n))
+        values = (lifted_labels[:n] != lifted_labels[first[labels]]).astype(np.int8)
+
+        solved = core & balanced[labels]
+        self.steps.append(('fixed', np.flatnonzero(solved), values[solved]))
+
+        keep = ~solved[self.row]
+        self.row, self.col, self.weights = self.row[keep], self.col[keep], self.weights[keep]
+        self.core_nodes = np.flatnonzero(core & ~solved)
+        self.core_labels = labels[self.core_nodes]
+
+    def core_bqm(self):
+        '''Returns the BQM of the frustrated core, with variables 0 .. len(core_nodes)-1'''
+
+        index = np.full(self.num_nodes, -1, dtype=np.int64)
+        index[self.core_nodes] = np.arange(len(self.core_nodes))
+
+        edges = np.column_stack((index[self.row], index[self.col]))
+
+        return social_graph.friends_enemies_bqm(edges, self.weights, len(self.core_nodes))
+
+    def expand(self, core_solution):
+        """Returns the solution of every person given a solution of the core.
+
+        Args:
+            core_solution (array): Set of each core person, in the order of core_nodes
+
+        Returns:
+            int8 array with the set (0 or 1) of each person
+        """
+        solution = np.zeros(self.num_nodes, dtype=np.int8)
+        solution[self.core_nodes] = np.asarray(core_solution, dtype=np.int8)
+
+        for step in reversed(self.steps):
+            if step[0] == 'fixed':
+                solution[step[1]] = step[2]
+            elif step[0] == 'follow':
+                _, v, u, flip = step
+                solution[v] = solution[u] ^ flip
+            elif step[0] == 'series':
+                _, v, u, k, a, b = step
+                cost = [a * (x != solution[u]) + b * (x != solution[k]) for x in (0, 1)]
+                solution[v] = int(cost[1] < cost[0])
+            else:
+                solution[step[1]] = 0
+
+        return solution
@@ -13,63 +13,88 @@
 # limitations under the License.
 
 ## ------- import packages -------
-import random
+import argparse
+import os
+import sys
 
 import matplotlib
 matplotlib.use("agg")
 import matplotlib.pyplot as plt
 
+import balance
 import dimod
-import networkx as nx
+import edge_ingest
+import frustration
+import instances
+import network_plots
+import social_graph
 from dwave.system import LeapHybridSampler
 from dimod import BinaryQuadraticModel
 
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import ComponentSampler
+
+# Graphs with more people are plotted from the edge arrays instead of with networkx
+LARGE_GRAPH = 100
+
+# Connected components up to this many people are solved exactly instead of on the hybrid sampler
+SMALL_COMPONENT = 10
+
+# Change these parameters to change the size of the graph and its probability of edge creation
+GRAPH_SIZE = 2000
+EDGE_PROBABILITY = 0.60
+
 def get_graph():
     """ Randomly generates a graph that represents a social network (nodes will
     represent people and edges represent relationships between people)
     """
 
-    # Change this parameter to change the size of the graph
-    graph_size = 2000
-
-    # Generate a random graph (with a 60% probability of edge creation)
-    G = nx.gnp_random_graph(graph_size, 0.60)
+    # Generate a random graph (with a 60% probability of edge creation), stored as edge arrays
+    G = social_graph.EdgeListGraph.gnp(GRAPH_SIZE, EDGE_PROBABILITY)
 
     return G
 
 # Define a BQM
-def get_bqm(G):
+def get_bqm(G, seed=None):
     """ Randomly assign a friendly or hostile relationship to edges in the dictionary.
 
+    All the relationships are drawn at once and the BQM is built from the
+    edge arrays in one step (see social_graph.friends_enemies_bqm).
+
     Args:
-        G: (:obj:`networkx.Graph`):
-            A networkx graph where the nodes represent people and the
+        G: (:obj:`social_graph.EdgeListGraph` or :obj:`networkx.Graph`):
+            A graph where the nodes represent people and the
             edges represent relationships between people
 
+        seed: (:obj:`int`):
+            Random seed of the relationships
+
     Returns:
         :obj:`BinaryQuadraticModel`: A binary-valued binary quadratic model
     """
-    # Build the BQM
-    bqm = BinaryQuadraticModel('BINARY')
-
-    # Add linear and quadratic biases to the BQM
-    for i, j in G.edges:
-        rand = random.choice([-1,1])
-        #Q[(i,i)]= 1*rand
-        bqm.add_variable(i, 1*rand)
-        #Q[(j,j)]= 1*rand
-        bqm.add_variable(j, 1*rand)
-        #Q[(i,j)]= -2*rand
-        bqm.add_interaction(i,j, -2*rand)
+    edge_list = social_graph.as_edge_list(G)
 
-    
-    print(bqm)
+    # Friendly (+1) or hostile (-1) relationship of each edge
+    signs = social_graph.random_signs(edge_list.number_of_edges(), seed)
+
+    # Build the BQM: linear biases sign on both people, interaction -2*sign
+    bqm = social_graph.friends_enemies_bqm(edge_list.edges, signs, edge_list.num_nodes)
+
+    # Keep the node labels of a networkx graph
+    if edge_list is not G:
+        bqm.relabel_variables(dict(enumerate(G.nodes)))
+
+    print(bqm.num_variables, "people,", bqm.num_interactions, "relationships")
     return bqm
 
 
 # Add the hybrid sampler and return the sampleset
 def run_on_hybrid(bqm):
-    """ Submits the BQM to the BQM hybrid sampler and returns the sampleset
+    """ Submits the BQM to the BQM hybrid sampler and returns the sampleset. Each
+    group of people without relationships to the others (connected component) is
+    an independent problem: small ones are solved exactly, the others on the hybrid
+    sampler, concurrently, and the samples are joined back together
 
     :param bqm: BQM for the problem
     :return: Sampleset from the hybrid sampler
@@ -81,18 +106,44 @@ def run_on_hybrid(bqm):
     Returns:
         :obj:`SampleSet`: The sampleset from the hybrid sampler
     """
-    sampler = LeapHybridSampler()
+    sampler = ComponentSampler([(SMALL_COMPONENT, dimod.ExactSolver), (None, LeapHybridSampler)])
     sampleset = sampler.sample(bqm)
     return sampleset
 
+def run_with_presolve(bqm):
+    """ Solves the parts of the problem that can be solved exactly (see balance.py), submits
+    only the frustrated core to the BQM hybrid sampler and expands the solution to everyone
+
+    Args:
+        bqm: (:obj:`BinaryQuadraticModel`):
+            The BQM for the friends and enemies problem
+
+    Returns:
+        :obj:`SampleSet`: One sample of the full problem, with its energy on bqm
+    """
+    nodes, row, col, weights = social_graph.bqm_relationships(bqm)
+    presolver = balance.BalancePresolver(len(nodes), row, col, weights)
+
+    core = presolver.core_bqm()
+    print("Presolve left", core.num_variables, "of", len(nodes), "people for the sampler")
+
+    core_solution = []
+    if core.num_variables:
+        core_solution = social_graph.solution_array(run_on_hybrid(core), range(core.num_variables))
+
+    solution = presolver.expand(core_solution)
+
+    return dimod.SampleSet.from_samples_bqm((solution.reshape(1, -1), nodes), bqm)
+
 def visualize(G, bqm, sampleset, problem_filename, solution_filename):
     """ Creates and saves plots that show the problem and solution returned in the lowest
     energy sample in the sampleset. It also prints the solution in a bipartite layout
-    with the filename bipartite_solution_filename.
+    with the filename bipartite_solution_filename. Graphs with more than LARGE_GRAPH
+    people get the sampled, density and block-matrix plots of network_plots instead.
 
     Args:
-        G: (:obj:`networkx.Graph`):
-            The Networkx graph of the friends and enemies problem
+        G: (:obj:`social_graph.EdgeListGraph` or :obj:`networkx.Graph`):
+            The graph of the friends and enemies problem
 
         BQM: (:obj:`BinaryQuadraticModel`):
             The BQM for the friends and enemies problem
@@ -106,6 +157,16 @@ def visualize(G, bqm, sampleset, problem_filename, solution_filename):
         solution_filename: (:obj:`Str`):
             The filename for the graph of the solution
     """
+    # Large graphs: sampled edges, density raster and block matrix from the edge arrays
+    if G.number_of_nodes() > LARGE_GRAPH:
+        nodes, row, col, weights = social_graph.bqm_relationships(bqm)
+        solution = social_graph.solution_array(sampleset, nodes)
+        network_plots.visualize_large(len(nodes), row, col, weights, solution, problem_filename, solution_filename)
+        return
+
+    import networkx as nx
+    G = social_graph.as_networkx(G)
+
     # Get the best solution to display
     sample = sampleset.first.sample
 
@@ -153,77 +214,91 @@ def visualize(G, bqm, sampleset, problem_filename, solution_filename):
 
     plt.savefig("partitioned_{}".format(solution_filename), bbox_inches='tight')
 
-def process_sampleset(G, sampleset):
+def process_sampleset(bqm, sampleset):
     """ Prints a summary of hostile and friendly edges in each set and between sets.
 
     Args:
-        G: (:obj:`networkx.Graph`):
-            The Networkx graph of the friends and enemies problem
+        bqm: (:obj:`BinaryQuadraticModel`):
+            The BQM for the friends and enemies problem
 
         sampleset: (:obj:`SampleSet`):
             The sampleset from the QPU sampler
     """
-    # Get the best solution to display
-    sample = sampleset.first.sample
+    # Edges and relationships of the BQM, and the best solution as a 0/1 array in the same node order
+    nodes, row, col, weights = social_graph.bqm_relationships(bqm)
+    solution = social_graph.solution_array(sampleset, nodes)
 
-    # Get a subset of the original graph (just the nodes assigned to group 1)
-    set1_nodes = [node for node in sample if sample[node] == 1]
-    subgraph1 = G.subgraph(set1_nodes)
-    set0_nodes = list(set(G.nodes()) - set(set1_nodes))
-    subgraph0 = G.subgraph(set0_nodes)
-
-    # Get friendly and hostile relationships in set 0
-    set0_friendly = 0
-    set0_hostile = 0
-    for i, j in subgraph0.edges:
-        if i != j and bqm.get_quadratic(i, j) < 0:
-            set0_friendly += 1
-        elif i != j and bqm.get_quadratic(i, j) > 0:
-            set0_hostile += 1
-
-    # Get friendly and hostile relationships in set 1
-    set1_friendly = 0
-    set1_hostile = 0
-    for i, j in subgraph1.edges:
-        if i != j and bqm.get_quadratic(i, j) < 0:
-            set1_friendly += 1
-        elif i != j and bqm.get_quadratic(i, j) > 0:
-            set1_hostile += 1
-
-    # Get friendly and hostile relationships between the sets
-    cut_edges = G.edges - subgraph0.edges - subgraph1.edges
-    cut_friendly = 0
-    cut_hostile = 0
-    for i, j in cut_edges:
-        if i != j and bqm.get_quadratic(i, j) < 0:
-            cut_friendly += 1
-        elif i != j and bqm.get_quadratic(i, j) > 0:
-            cut_hostile += 1
+    # Count friendly and hostile relationships in set 0, set 1 and between the sets
+    counts = social_graph.relationship_tally(solution, row, col, weights)
 
     # Print the results
     print('-' * 60)
     print('{:>15s}{:>15s}{:^15s}'.format('Set', 'Friendly', 'Hostile'))
     print('-' * 60)
 
-    print('{:>15s}{:>15s}{:^15s}'.format('0', str(set0_friendly), str(set0_hostile)))
-    print('{:>15s}{:>15s}{:^15s}'.format('1', str(set1_friendly), str(set1_hostile)))
-    print('{:>15s}{:>15s}{:^15s}'.format('0 -> 1', str(cut_friendly), str(cut_hostile)))
+    for name, (friendly, hostile) in zip(['0', '1', '0 -> 1'], counts):
+        print('{:>15s}{:>15s}{:^15s}'.format(name, str(friendly), str(hostile)))
+
+def report_quality(bqm, sampleset):
+    """ Prints how many relationships the best solution frustrates (friends split up or
+    enemies together) against the best split found by frustration.py, and the gap
+
+    Args:
+        bqm: (:obj:`BinaryQuadraticModel`):
+            The BQM for the friends and enemies problem
+
+        sampleset: (:obj:`SampleSet`):
+            The sampleset from the hybrid sampler
+    """
+    nodes, row, col, weights = social_graph.bqm_relationships(bqm)
+    solution = social_graph.solution_array(sampleset, nodes)
+
+    quality = frustration.solution_quality(len(nodes), row, col, weights, solution)
+    best = "frustration index" if quality['exact'] else "best found by local search"
+
+    print("Frustrated relationships: {:g} ({}: {:g}), gap {:g} ({:.1%})".format(
+        quality['frustrated'], best, quality['best'], quality['gap'], quality['relative_gap']))
 
 ## ------- Main program -------
 if __name__ == "__main__":
-    # Generate a random graph (with a 75% probability of edge creation)
-    G = get_graph()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--edges', help='signed edge list to solve (.csv, .txt, .tsv, .parquet or .bin, '
+                                        'see edge_ingest.py) instead of a random graph')
+    parser.add_argument('--instance', help='instance file to solve, see instances.py')
+    parser.add_argument('--seed', type=int, help='solve the reproducible random instance of this seed '
+                                                 '(saved in instances/ on first use)')
+    args = parser.parse_args()
+
+    if args.edges:
+        # Stream a real social network into edge arrays and its BQM
+        G, signs, bqm, labels = edge_ingest.load_signed_graph(args.edges)
+        print(bqm.num_variables, "people,", bqm.num_interactions, "relationships")
+
+    elif args.instance or args.seed is not None:
+        # Reload a saved instance, or the instance of the seed, so that runs can be compared
+        if args.instance:
+            G, signs, info = instances.load_instance(args.instance)
+        else:
+            G, signs, info = instances.cached_instance(GRAPH_SIZE, EDGE_PROBABILITY, args.seed)
+        bqm = social_graph.friends_enemies_bqm(G.edges, signs, G.num_nodes)
+        print("Instance n={num_nodes}, p={p:g}, seed={seed}:".format(**info),
+              bqm.num_variables, "people,", bqm.num_interactions, "relationships")
+
+    else:
+        # Generate a random graph (with a 60% probability of edge creation)
+        G = get_graph()
+        bqm = get_bqm(G)
 
-    # Solve this problem on the BQM hybrid solver
-    bqm = get_bqm(G)
-    sampleset = run_on_hybrid(bqm)
+    # Solve this problem on the BQM hybrid solver, after solving what can be solved exactly
+    sampleset = run_with_presolve(bqm)
 
     if sampleset.variables != []:
         # Visualize results
         visualize(G, bqm, sampleset, "hybrid_problem_graph.png", "hybrid_solution_graph.png")
 
         # Process results
-        process_sampleset(G, sampleset)
+        process_sampleset(bqm, sampleset)
+        report_quality(bqm, sampleset)
 
     else:
         print("\nNo samples returned.\n")
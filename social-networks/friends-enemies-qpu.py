@@ -13,7 +13,10 @@
 # limitations under the License.
 
 ## ------- import packages -------
+import argparse
+import os
 import random
+import sys
 
 import matplotlib
 matplotlib.use("agg")
@@ -22,24 +25,32 @@ import matplotlib.pyplot as plt
 from collections import defaultdict
 import networkx as nx
 import dimod
-from dwave.system import DWaveSampler, EmbeddingComposite
+import frustration
+import instances
+import social_graph
+from dwave.system import DWaveSampler
+
+# Make the shared local_solvers package importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from local_solvers import CachedEmbeddingComposite, ComponentSampler, LocalIsingSampler
+
+#Change these parameters if you'd like to change the size of the graph (social network) and its probability of edge creation
+GRAPH_SIZE = 10
+EDGE_PROBABILITY = 0.60
 
 def get_graph():
     """ Randomly generates a graph that represents a social network (nodes will
     represent people and edges represent relationships between people)
     """
 
-    #Change this parameter if you'd like to change the size of the graph (social network)
-    graph_size = 10
-
     # Generate a random graph (with a 60% probability of edge creation)
-    G = nx.gnp_random_graph(graph_size, 0.60)
+    G = nx.gnp_random_graph(GRAPH_SIZE, EDGE_PROBABILITY)
 
     return G
 
 
 # Define your QUBO dictionary
-def get_qubo(G):
+def get_qubo(G, signs=None):
     """ Randomly assign a friendly or hostile relationship to edges in the dictionary.
 
     Args:
@@ -47,6 +58,10 @@ def get_qubo(G):
             A networkx graph where the nodes represent people and the
             edges represent relationships between people
 
+        signs: (:obj:`Dict`):
+            Relationship (1 friendly, -1 hostile) of each edge (i, j), i < j,
+            for example from an instance file; random when not given
+
     Returns:
         :obj:`Dict`: A QUBO dictionary
     """
@@ -55,29 +70,39 @@ def get_qubo(G):
 
     # Add QUBO construction here. remember is problem-based! in this case we model friendly and hostile relationships that favour friendly ones.
     for i, j in G.edges:
-        rand = random.choice([-1,1]) #QPU computes Ising model. remember dwave hybrid flow: QUBO > ISING > QMI > QPU > ISING > QUBO
-        Q[(i,i)]= 1*rand
-        Q[(j,j)]= 1*rand
-        Q[(i,j)]= -2*rand
+        rand = random.choice([-1,1]) if signs is None else signs[min(i, j), max(i, j)] #QPU computes Ising model. remember dwave hybrid flow: QUBO > ISING > QMI > QPU > ISING > QUBO
+        Q[(i,i)]+= 1*rand
+        Q[(j,j)]+= 1*rand
+        Q[(i,j)]+= -2*rand
 
     print(Q)
     return Q
 
 
+def qpu_sampler():
+    '''Returns the QPU sampler (called once per worker process by ComponentSampler)'''
+
+    return CachedEmbeddingComposite(DWaveSampler())
+
 # Add the QPU sampler and return the sampleset
-def run_on_qpu(Q):
-    """ Submits the QUBO to a QPU sampler and returns the sampleset
+def run_on_qpu(Q, local=False):
+    """ Submits the QUBO to a QPU sampler and returns the sampleset. Each connected
+    component of the graph is embedded and sampled on its own, concurrently, and the
+    samples are joined back together
 
     Args:
         Q: (:obj:`Dict`):
             The QUBO for the friends and enemies problem
 
+        local: (:obj:`bool`):
+            Sample on the local Ising sampler instead of the QPU
+
     Returns:
         :obj:`SampleSet`: The sampleset from the QPU sampler
     """
     numruns = 100 
 
-    sampler = EmbeddingComposite(DWaveSampler())
+    sampler = ComponentSampler([(None, LocalIsingSampler if local else qpu_sampler)])
 
     sampleset = sampler.sample_qubo(Q, num_reads=numruns)
 
@@ -207,14 +232,63 @@ def process_sampleset(G, sampleset):
     print('{:>15s}{:>15s}{:^15s}'.format('1', str(set1_friendly), str(set1_hostile)))
     print('{:>15s}{:>15s}{:^15s}'.format('0 -> 1', str(cut_friendly), str(cut_hostile)))
 
+def report_quality(G, signs, sampleset):
+    """ Prints how many relationships the best solution frustrates (friends split up or
+    enemies together) against the best split found by frustration.py, and the gap
+
+    Args:
+        G: (:obj:`networkx.Graph`):
+            The Networkx graph of the friends and enemies problem
+
+        signs: (:obj:`Dict`):
+            Relationship (1 friendly, -1 hostile) of each edge (i, j), i < j
+
+        sampleset: (:obj:`SampleSet`):
+            The sampleset from the QPU sampler
+    """
+    # Frustration is counted on the relationships themselves, not read back from the QUBO
+    nodes = list(G.nodes)
+    position = {v: k for k, v in enumerate(nodes)}
+    row = [position[i] for i, _ in signs]
+    col = [position[j] for _, j in signs]
+    signs = list(signs.values())
+    solution = social_graph.solution_array(sampleset, nodes)
+
+    quality = frustration.solution_quality(len(nodes), row, col, signs, solution)
+    best = "frustration index" if quality['exact'] else "best found by local search"
+
+    print("Frustrated relationships: {:g} ({}: {:g}), gap {:g} ({:.1%})".format(
+        quality['frustrated'], best, quality['best'], quality['gap'], quality['relative_gap']))
+
 ## ------- Main program -------
 if __name__ == "__main__":
-    # Generate a graph of a social network
-    G = get_graph()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--instance', help='instance file to solve, see instances.py')
+    parser.add_argument('--seed', type=int, help='solve the reproducible random instance of this seed '
+                                                 '(saved in instances/ on first use)')
+    parser.add_argument('--local', action='store_true', help='sample on the local Ising sampler instead of the QPU')
+    args = parser.parse_args()
+
+    if args.instance or args.seed is not None:
+        # Reload a saved instance, or the instance of the seed, so that runs can be compared
+        if args.instance:
+            edges, signs, info = instances.load_instance(args.instance)
+        else:
+            edges, signs, info = instances.cached_instance(GRAPH_SIZE, EDGE_PROBABILITY, args.seed)
+        print("Instance n={num_nodes}, p={p:g}, seed={seed}".format(**info))
+
+        G = edges.to_networkx()
+        signs = dict(zip(zip(edges.row.tolist(), edges.col.tolist()), signs.tolist()))
+
+    else:
+        # Generate a graph of a social network and a random relationship for each edge
+        G = get_graph()
+        signs = {(min(i, j), max(i, j)): random.choice([-1,1]) for i, j in G.edges}
+
+    Q = get_qubo(G, signs)
 
     # Solve this problem on a QPU solver
-    Q = get_qubo(G)
-    sampleset = run_on_qpu(Q)
+    sampleset = run_on_qpu(Q, args.local)
 
     if sampleset.variables != []:
         # Visualize results
@@ -222,6 +296,7 @@ if __name__ == "__main__":
 
         # Process results
         process_sampleset(G, sampleset)
+        report_quality(G, signs, sampleset)
 
     else:
         print("\nNo samples returned.\n")
@@ -0,0 +1,240 @@
+"""Energy evaluation and frustration index of friends and enemies solutions.
+
+A relationship is frustrated when friends end up in different sets or
+enemies in the same set. The frustration index of a signed graph is the
+smallest (weighted) number of frustrated relationships over all splits,
+and the friends and enemies BQM energy of a split is its frustration minus
+the total weight of the hostile relationships, so the two rank solutions
+the same way.
+
+The best split is found with the exact presolve of balance.py, then, for
+each connected component of the frustrated core, by branch and bound when
+it has at most EXACT_LIMIT people and by multi-start local search
+otherwise. The local search also starts from the solution being judged,
+so the reported gap is never negative: it is exact when every component
+was solved exactly, and otherwise a lower bound on how far the solution is
+from optimal.
+"""
+
+import numpy as np
+from scipy import sparse
+
+import balance
+
+# Largest core component solved exactly by branch and bound
+EXACT_LIMIT = 26
+
+# Random starts of the local search on larger components
+RESTARTS = 8
+
+def split_edges(solutions, row, col):
+    '''Returns, for each solution (row of a 2D array) and each edge, whether its two people are in different sets'''
+
+    solutions = np.atleast_2d(solutions)
+
+    return solutions[:, row] != solutions[:, col]
+
+def energy(solutions, row, col, weights):
+    """Returns the friends and enemies BQM energy of one or several solutions.
+
+    Each edge with weight w costs w when its people are in different sets.
+
+    Args:
+        solutions (array): Set (0 or 1) of each person, or a 2D array with
+            one solution per row
+        row, col (array): Endpoints of each edge
+        weights (array): Weight (sign) of each edge
+
+    Returns:
+        Energy, or array of energies for a 2D array of solutions
+    """
+    energies = split_edges(solutions, row, col) @ np.asarray(weights, dtype=float)
+
+    return energies if np.ndim(solutions) > 1 else energies[0]
+
+def frustration(solutions, row, col, weights):
+    '''Returns the weight of the frustrated relationships of one or several solutions'''
+
+    weights = np.asarray(weights, dtype=float)
+
+    return energy(solutions, row, col, weights) - weights[weights < 0].sum()
+
+def branch_and_bound(num_nodes, row, col, weights, upper=np.inf):
+    """Finds a split with the fewest frustrated relationships by branch and bound.
+
+    People are assigned in breadth-first order from the best connected one
+    (which is fixed to set 0, the two sets being symmetric), and a branch is
+    cut when its frustration plus the cheapest choice of every unassigned
+    person against the assigned ones reaches the best found so far.
+
+    Args:
+        num_nodes (int): Number of people
+        row, col (array): Endpoints of each edge
+        weights (array): Weight of each edge
+        upper (float): Frustration of a known solution, to prune from the start
+
+    Returns:
+        Tuple (frustration, solution), solution None if none beats upper
+    """
+    n = num_nodes
+    weights = np.asarray(weights, dtype=float)
+
+    friendly = np.zeros((n, n))
+    hostile = np.zeros((n, n))
+    np.add.at(friendly, (row, col), np.maximum(weights, 0))
+    np.add.at(hostile, (row, col), np.maximum(-weights, 0))
+    friendly += friendly.T
+    hostile += hostile.T
+
+    # Breadth-first order, so that each person is tied to the people assigned before
+    order = list(sparse.csgraph.breadth_first_order(sparse.csr_matrix(friendly + hostile),
+                                                    int(np.argmax((friendly + hostile).sum(axis=1))),
+                                                    directed=False, return_predecessors=False))
+    reached = set(order)
+    order += [v for v in range(n) if v not in reached]
+
+    # cost[v, b]: frustration between v in set b and the people assigned so far
+    cost = np.zeros((n, 2))
+    solution = np.zeros(n, dtype=np.int8)
+    best = [upper, None]
+
+    def search(k, current):
+        if k == n:
+            best[0], best[1] = current, solution.copy()
+            return
+
+        v, rest = order[k], order[k+1:]
+        choices = (0,) if k == 0 else np.argsort(cost[v], kind='stable')
+
+        for b in choices:
+            # v in set b frustrates friends in the other set and enemies in set b
+            cost[:, 1 - b] += friendly[v]
+            cost[:, b] += hostile[v]
+
+            value = current + cost[v, b]
+            if value + np.minimum(cost[rest, 0], cost[rest, 1]).sum() < best[0] - 1e-9:
+                solution[v] = b
+                search(k + 1, value)
+
+            cost[:, 1 - b] -= friendly[v]
+            cost[:, b] -= hostile[v]
+
+    search(0, 0.0)
+
+    return best[0], best[1]
+
+def local_search(num_nodes, row, col, weights, starts):
+    """Improves each start by flipping single people while that lowers the energy.
+
+    Args:
+        num_nodes (int): Number of people
+        row, col (array): Endpoints of each edge
+        weights (array): Weight of each edge
+        starts (array): 2D array with one initial solution per row
+
+    Returns:
+        Tuple (energy, solution) of the best local minimum
+    """
+    weights = np.asarray(weights, dtype=float)
+    W = sparse.coo_matrix((np.concatenate((weights, weights)), (np.concatenate((row, col)), np.concatenate((col, row)))),
+                          shape=(num_nodes, num_nodes)).tocsr()
+    indptr, indices, data = W.indptr, W.indices, W.data
+
+    best = (np.inf, None)
+    for start in np.atleast_2d(starts):
+        # Spins s = 2x - 1; flipping v changes the energy by s[v] * (W s)[v]
+        s = 2.0 * start - 1
+        field = W @ s
+
+        improved = True
+        while improved:
+            improved = False
+            for v in np.flatnonzero(s * field < -1e-9):
+                if s[v] * field[v] < -1e-9:
+                    neighbours = slice(indptr[v], indptr[v+1])
+                    field[indices[neighbours]] -= 2 * data[neighbours] * s[v]
+                    s[v] = -s[v]
+                    improved = True
+
+        solution = (s > 0).astype(np.int8)
+        value = energy(solution, row, col, weights)
+        if value < best[0]:
+            best = (value, solution)
+
+    return best
+
+def best_split(num_nodes, row, col, weights, solution=None, exact_limit=EXACT_LIMIT, restarts=RESTARTS, seed=None):
+    """Finds the split with the fewest frustrated relationships, exactly when the problem is small enough.
+
+    Args:
+        num_nodes (int): Number of people
+        row, col (array): Endpoints of each edge
+        weights (array): Weight of each edge
+        solution (array): Known solution, used as a start of the local search
+        exact_limit (int): Largest core component solved by branch and bound
+        restarts (int): Random starts of the local search
+        seed (int): Random seed of the starts
+
+    Returns:
+        Tuple (solution, exact): the best solution found and whether it is
+        proven optimal
+    """
+    rng = np.random.default_rng(seed)
+    presolver = balance.BalancePresolver(num_nodes, row, col, weights)
+
+    core_nodes = presolver.core_nodes
+    core_solution = np.zeros(len(core_nodes), dtype=np.int8)
+    exact = True
+
+    # Group the core people and edges by component, numbering people from 0 within their component
+    _, component = np.unique(presolver.core_labels, return_inverse=True)
+    sizes = np.bincount(component)
+    members = np.argsort(component, kind='stable')
+    node_starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    position = np.empty(num_nodes, dtype=np.int64)
+    position[core_nodes[members]] = np.arange(len(members)) - node_starts[component[members]]
+    component_of = np.empty(num_nodes, dtype=np.int64)
+    component_of[core_nodes] = component
+
+    edge_component = component_of[presolver.row]
+    edges = np.argsort(edge_component, kind='stable')
+    edge_starts = np.concatenate(([0], np.cumsum(np.bincount(edge_component, minlength=len(sizes)))))
+
+    for k in range(len(sizes)):
+        group = members[node_starts[k]:node_starts[k+1]]
+        nodes = core_nodes[group]
+        e = edges[edge_starts[k]:edge_starts[k+1]]
+        r, c, w = position[presolver.row[e]], position[presolver.col[e]], presolver.weights[e]
+
+        starts = rng.integers(2, size=(restarts, len(nodes)), dtype=np.int8)
+        if solution is not None:
+            starts = np.vstack((np.asarray(solution, dtype=np.int8)[nodes], starts))
+        value, found = local_search(len(nodes), r, c, w, starts)
+
+        if len(nodes) <= exact_limit:
+            hostile = -w[w < 0].sum()
+            _, improved = branch_and_bound(len(nodes), r, c, w, upper=value + hostile)
+            found = found if improved is None else improved
+        else:
+            exact = False
+
+        core_solution[group] = found
+
+    return presolver.expand(core_solution), exact
+
+def solution_quality(num_nodes, row, col, weights, solution, **kwargs):
+    """Compares a solution with the best split found by best_split.
+
+    Returns:
+        Dict with the frustration of the solution ('frustrated'), the best
+        frustration found ('best'), whether it is the frustration index
+        ('exact'), and the gap between them ('gap', 'relative_gap')
+    """
+    best, exact = best_split(num_nodes, row, col, weights, solution, **kwargs)
+
+    frustrated = float(frustration(solution, row, col, weights))
+    lowest = min(float(frustration(best, row, col, weights)), frustrated)
+
+    return {'frustrated': frustrated, 'best': lowest, 'exact': exact,
+            'gap': frustrated - lowest, 'relative_gap': (frustrated - lowest) / max(lowest, 1)}
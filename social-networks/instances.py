@@ -0,0 +1,103 @@
+"""Reproducible friends and enemies problem instances.
+
+An instance is a G(n, p) social network and the sign of each relationship,
+generated from (n, p, seed) alone: the seed is split with numpy's
+SeedSequence into one stream for the graph and one for the signs, so the
+same triple always gives the same problem. Instances are stored as
+compressed .npz files holding the edge arrays, the signs and the triple,
+so benchmarks can reload exactly the same problem across solver versions
+without regenerating it (and without depending on the generator staying
+the same).
+
+Usage:
+    python instances.py 2000 0.6 42          # writes instances/gnp_2000_0.6_42.npz
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+import social_graph
+
+# Where cached_instance keeps the instance files
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instances')
+
+# Version of the instance file layout
+INSTANCE_VERSION = 1
+
+def generate_instance(num_nodes, p, seed=None):
+    """Generates the G(n, p) social network and relationship signs of a seed.
+
+    Args:
+        num_nodes (int): Number of people
+        p (float): Probability of a relationship between two people
+        seed (int): Random seed; None draws a fresh one, reported in info
+
+    Returns:
+        Tuple (G, signs, info): the :obj:`social_graph.EdgeListGraph`, the
+        int8 sign of each edge, and a dict with num_nodes, p and seed
+    """
+    sequence = np.random.SeedSequence(seed)
+    graph_seed, sign_seed = sequence.spawn(2)
+
+    G = social_graph.EdgeListGraph.gnp(num_nodes, p, seed=graph_seed)
+    signs = social_graph.random_signs(G.number_of_edges(), seed=sign_seed)
+
+    return G, signs, {'num_nodes': int(num_nodes), 'p': float(p), 'seed': sequence.entropy}
+
+def save_instance(filename, G, signs, info):
+    '''Saves an instance to a compressed .npz file'''
+
+    np.savez_compressed(filename, version=INSTANCE_VERSION, num_nodes=G.num_nodes, p=info['p'],
+                        seed=str(info['seed']), row=G.row, col=G.col, signs=np.asarray(signs, dtype=np.int8))
+
+def load_instance(filename):
+    """Loads an instance saved by save_instance.
+
+    Returns:
+        Tuple (G, signs, info) as generate_instance
+    """
+    with np.load(filename) as data:
+        if int(data['version']) != INSTANCE_VERSION:
+            raise ValueError("{} has instance version {}, expected {}".format(
+                filename, int(data['version']), INSTANCE_VERSION))
+
+        G = social_graph.EdgeListGraph(int(data['num_nodes']), data['row'], data['col'])
+        info = {'num_nodes': G.num_nodes, 'p': float(data['p']), 'seed': int(str(data['seed']))}
+
+        return G, data['signs'], info
+
+def instance_filename(num_nodes, p, seed, directory=INSTANCE_DIR):
+    '''Returns the file of the instance (n, p, seed) in directory'''
+
+    return os.path.join(directory, 'gnp_{}_{:g}_{}.npz'.format(num_nodes, p, seed))
+
+def cached_instance(num_nodes, p, seed, directory=INSTANCE_DIR):
+    '''Returns the instance (n, p, seed), loading it from directory or generating and saving it there'''
+
+    filename = instance_filename(num_nodes, p, seed, directory)
+    if os.path.exists(filename):
+        return load_instance(filename)
+
+    G, signs, info = generate_instance(num_nodes, p, seed)
+
+    os.makedirs(directory, exist_ok=True)
+    partial = '{}.{}.npz'.format(filename[:-4], os.getpid())
+    save_instance(partial, G, signs, info)
+    os.replace(partial, filename)
+
+    return G, signs, info
+
+## ------- Main program -------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a friends and enemies instance file')
+    parser.add_argument('num_nodes', type=int, help='number of people')
+    parser.add_argument('p', type=float, help='probability of a relationship between two people')
+    parser.add_argument('seed', type=int, help='random seed')
+    parser.add_argument('--directory', default=INSTANCE_DIR, help='where to write the instance file')
+    args = parser.parse_args()
+
+    G, signs, info = cached_instance(args.num_nodes, args.p, args.seed, args.directory)
+    print(instance_filename(args.num_nodes, args.p, args.seed, args.directory) + ":",
+          G.num_nodes, "people,", G.number_of_edges(), "relationships")
@@ -0,0 +1,230 @@
+"""Plots of friends and enemies solutions that stay fast on large graphs.
+
+Drawing every node, label and edge with networkx takes minutes on a
+network with a million relationships and the picture is unreadable. The
+plots here work from the edge arrays instead:
+
+    - a node-link view of a random sample of the edges, on a spectral
+      layout that is cached on disk by graph hash
+    - a density raster of the edges inside the sets and between the sets,
+      accumulated as 2D histograms of points along each edge
+    - a block matrix: the people ordered by set and binned, each cell
+      showing the share of friendly relationships between two bins
+"""
+
+import hashlib
+import os
+
+import matplotlib
+matplotlib.use("agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+from scipy import sparse
+from scipy.sparse.linalg import eigsh
+
+# Where the layouts are cached
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# Colors of the two sets and of the relationships, as in the networkx plots
+BLUE = '#2a7de1'
+YELLOW = '#fcba03'
+FRIENDLY = 'g'
+HOSTILE = 'r'
+
+def graph_hash(num_nodes, row, col):
+    '''Returns a hash identifying the graph given by its edge arrays'''
+
+    digest = hashlib.sha1()
+    digest.update(np.int64(num_nodes).tobytes())
+    digest.update(np.ascontiguousarray(row, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(col, dtype=np.int64).tobytes())
+
+    return digest.hexdigest()
+
+def spectral_layout(num_nodes, row, col, seed=0):
+    """Places the nodes on the two leading non-trivial eigenvectors of the normalized adjacency matrix.
+
+    Returns:
+        (nodes x 2) array of positions scaled to [-1, 1]
+    """
+    if num_nodes < 3:
+        return np.column_stack((np.linspace(-1, 1, num_nodes), np.zeros(num_nodes)))
+
+    adjacency = sparse.coo_matrix((np.ones(2 * len(row)), (np.concatenate((row, col)), np.concatenate((col, row)))),
+                                  shape=(num_nodes, num_nodes)).tocsr()
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    scale = sparse.diags(np.where(degree > 0, 1 / np.sqrt(np.maximum(degree, 1)), 0))
+
+    v0 = np.random.default_rng(seed).random(num_nodes)
+    _, vectors = eigsh(scale @ adjacency @ scale, k=3, which='LA', v0=v0)
+
+    pos = vectors[:, :2]
+    pos = pos - pos.mean(axis=0)
+
+    return pos / np.maximum(np.abs(pos).max(axis=0), 1e-300)
+
+def cached_layout(num_nodes, row, col, cache_dir=CACHE_DIR):
+    '''Returns the spectral layout of the graph, computing it only once per graph'''
+
+    if cache_dir is None:
+        return spectral_layout(num_nodes, row, col)
+
+    cache_file = os.path.join(cache_dir, 'layout_{}.npy'.format(graph_hash(num_nodes, row, col)))
+    if os.path.exists(cache_file):
+        return np.load(cache_file)
+
+    pos = spectral_layout(num_nodes, row, col)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = '{}.{}.npy'.format(cache_file[:-4], os.getpid())
+    np.save(partial, pos)
+    os.replace(partial, cache_file)
+
+    return pos
+
+def sample_edges(num_edges, max_edges, seed=0):
+    '''Returns the indices of at most max_edges edges drawn at random'''
+
+    if num_edges <= max_edges:
+        return np.arange(num_edges)
+
+    return np.sort(np.random.default_rng(seed).choice(num_edges, max_edges, replace=False))
+
+def split_layout(pos, solution):
+    '''Moves the people of set 0 to the left and those of set 1 to the right'''
+
+    return pos * 0.8 + np.where(solution[:, np.newaxis] == 0, [-1.2, 0], [1.2, 0])
+
+def draw_edges(ax, pos, row, col, signs, solution=None):
+    '''Draws the given edges as one LineCollection and the nodes as one scatter'''
+
+    segments = np.stack((pos[row], pos[col]), axis=1)
+    colors = np.where(signs > 0, FRIENDLY, HOSTILE)
+    alpha = min(1, max(0.05, 200 / max(len(row), 1) ** 0.5))
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=0.3, alpha=alpha))
+
+    nodecolors = 'k' if solution is None else np.where(solution == 0, BLUE, YELLOW)
+    ax.scatter(pos[:, 0], pos[:, 1], s=max(1, 2000 / max(len(pos), 1)), c=nodecolors, zorder=2)
+
+    ax.autoscale()
+    ax.set_axis_off()
+
+def edge_density(pos, row, col, resolution=400, points_per_edge=8, chunk=1 << 18):
+    """Rasterizes edges: counts, for each pixel, the points along the edges that fall into it.
+
+    Returns:
+        Tuple (density, extent) for matplotlib imshow
+    """
+    lo, hi = pos.min(axis=0), pos.max(axis=0)
+    bins = (np.linspace(lo[0], hi[0], resolution + 1), np.linspace(lo[1], hi[1], resolution + 1))
+    t = np.linspace(0, 1, points_per_edge)[:, np.newaxis, np.newaxis]
+
+    density = np.zeros((resolution, resolution))
+    for start in range(0, len(row), chunk):
+        a, b = pos[row[start:start+chunk]], pos[col[start:start+chunk]]
+        points = (a + t * (b - a)).reshape(-1, 2)
+        density += np.histogram2d(points[:, 0], points[:, 1], bins=bins)[0]
+
+    return density.T, (lo[0], hi[0], lo[1], hi[1])
+
+def block_matrix(solution, row, col, signs, num_bins=200):
+    """Aggregates the relationships between groups of people ordered by set.
+
+    Returns:
+        Tuple (share, boundary): (bins x bins) array with the share of friendly
+        relationships between two bins (NaN where there are none), and the
+        first bin of set 1
+    """
+    n = len(solution)
+    num_bins = max(1, min(num_bins, n))
+
+    # Rank people by set, then bin the ranks
+    order = np.argsort(solution, kind='stable')
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    bin_of = rank * num_bins // max(n, 1)
+
+    a, b = bin_of[row], bin_of[col]
+    cells = np.concatenate((a * num_bins + b, b * num_bins + a))
+    friendly = np.tile(signs > 0, 2)
+
+    total = np.bincount(cells, minlength=num_bins * num_bins).reshape(num_bins, num_bins)
+    friends = np.bincount(cells, friendly, minlength=num_bins * num_bins).reshape(num_bins, num_bins)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.where(total > 0, friends / total, np.nan)
+
+    return share, np.count_nonzero(solution == 0) * num_bins // max(n, 1)
+
+def prefixed(filename, prefix):
+    '''Returns filename with prefix added to its base name, in the same directory'''
+
+    directory, name = os.path.split(filename)
+
+    return os.path.join(directory, prefix + name)
+
+def visualize_large(num_nodes, row, col, signs, solution, problem_filename, solution_filename,
+                    max_edges=20000, cache_dir=CACHE_DIR):
+    """Saves the large-graph plots of the problem and of the solution.
+
+    Files:
+        problem_filename: sampled edges on the cached layout
+        solution_filename: sampled edges with the two sets pulled apart
+        density_<solution_filename>: edge density inside and between the sets
+        blocks_<solution_filename>: block matrix of the share of friendly relationships
+
+    Args:
+        num_nodes (int): Number of people
+        row, col (array): Endpoints of each edge (node indices)
+        signs (array): Sign (or summed weight) of each edge, positive friendly and negative hostile
+        solution (array): Set (0 or 1) of each person
+        problem_filename, solution_filename (str): Image files
+        max_edges (int): Largest number of edges drawn individually
+        cache_dir (str): Layout cache directory, None to disable it
+    """
+    row, col = np.asarray(row), np.asarray(col)
+    signs, solution = np.asarray(signs), np.asarray(solution)
+
+    pos = cached_layout(num_nodes, row, col, cache_dir)
+    shown = sample_edges(len(row), max_edges)
+    title = "{} of {} relationships shown".format(len(shown), len(row))
+
+    # Problem: sampled edges, colored by relationship
+    fig, ax = plt.subplots(figsize=(8, 8))
+    draw_edges(ax, pos, row[shown], col[shown], signs[shown])
+    ax.set_title(title)
+    fig.savefig(problem_filename, bbox_inches='tight')
+    plt.close(fig)
+
+    # Solution: the same edges with the two sets apart
+    split = split_layout(pos, solution)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_edges(ax, split, row[shown], col[shown], signs[shown], solution)
+    ax.set_title(title)
+    fig.savefig(solution_filename, bbox_inches='tight')
+    plt.close(fig)
+
+    # Density raster of all the edges, inside the sets and between them
+    between = solution[row] != solution[col]
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    for ax, mask, name in zip(axes, (~between, between), ('inside the sets', 'between the sets')):
+        density, extent = edge_density(split, row[mask], col[mask])
+        ax.imshow(np.log1p(density), origin='lower', extent=extent, cmap='magma', aspect='auto')
+        ax.set_title("{} edges {}".format(np.count_nonzero(mask), name))
+        ax.set_axis_off()
+    fig.savefig(prefixed(solution_filename, "density_"), bbox_inches='tight')
+    plt.close(fig)
+
+    # Block matrix of friendly shares, people ordered by set
+    share, boundary = block_matrix(solution, row, col, signs)
+    fig, ax = plt.subplots(figsize=(7, 6))
+    image = ax.imshow(share, cmap='RdYlGn', vmin=0, vmax=1, interpolation='nearest')
+    ax.axhline(boundary - 0.5, color='k')
+    ax.axvline(boundary - 0.5, color='k')
+    ax.set_title("Share of friendly relationships (people ordered by set)")
+    ax.set_xticks([])
+    ax.set_yticks([])
+    fig.colorbar(image, ax=ax)
+    fig.savefig(prefixed(solution_filename, "blocks_"), bbox_inches='tight')
+    plt.close(fig)
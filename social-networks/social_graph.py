@@ -0,0 +1,255 @@
+"""Array-based helpers for the friends and enemies social network.
+
+A social network is an edge list (EdgeListGraph: people 0 .. n-1 and two
+int32 arrays of endpoints) with one relationship sign per edge: +1 for
+friendly and -1 for hostile. Working on arrays keeps graphs with millions
+of relationships fast to build and analyse, and networkx is only imported
+when a graph is converted to or from it.
+"""
+
+import numpy as np
+from dimod import BinaryQuadraticModel
+
+# Largest number of candidate pairs drawn at once by the dense G(n, p) generator
+GNP_BLOCK = 1 << 22
+
+def row_start(i, n):
+    '''Returns the index of pair (i, i+1) in the row-major list of pairs of n nodes'''
+
+    return i * n - i * (i + 1) // 2
+
+class EdgeListGraph:
+    """Undirected graph stored as two int32 arrays of edge endpoints.
+
+    Nodes are 0 .. num_nodes-1 and each edge is stored once with row < col.
+    A CSR adjacency index (both directions) is built on first use.
+
+    Args:
+        num_nodes (int): Number of nodes
+        row, col (array): Endpoints of each edge
+    """
+
+    def __init__(self, num_nodes, row, col):
+        row = np.asarray(row, dtype=np.int32)
+        col = np.asarray(col, dtype=np.int32)
+
+        self.num_nodes = int(num_nodes)
+        self.row = np.minimum(row, col)
+        self.col = np.maximum(row, col)
+        self._adjacency = None
+
+    @classmethod
+    def gnp(cls, num_nodes, p, seed=None):
+        """Generates a G(n, p) random graph: each pair of nodes is an edge with probability p.
+
+        Dense graphs draw one random number per pair, a block of rows at a
+        time; sparse graphs (p < 0.1) draw the number of edges and then that
+        many distinct pairs, so the cost follows the number of edges.
+        """
+        rng = np.random.default_rng(seed)
+        n = int(num_nodes)
+        num_pairs = n * (n - 1) // 2
+
+        if p < 0.1:
+            num_edges = rng.binomial(num_pairs, p) if num_pairs else 0
+            return cls.from_pair_indices(n, rng.choice(num_pairs, num_edges, replace=False))
+
+        rows, cols = [], []
+        block = max(1, GNP_BLOCK // max(n, 1))
+        for start in range(0, n, block):
+            stop = min(n, start + block)
+            mask = rng.random((stop - start, n)) < p
+            mask &= np.arange(n) > np.arange(start, stop)[:, np.newaxis]
+            r, c = np.nonzero(mask)
+            rows.append((r + start).astype(np.int32))
+            cols.append(c.astype(np.int32))
+
+        return cls(n, np.concatenate(rows) if rows else [], np.concatenate(cols) if cols else [])
+
+    @classmethod
+    def from_pair_indices(cls, num_nodes, pairs):
+        '''Builds a graph from indices into the row-major list of pairs (i, j), i < j'''
+
+        n = num_nodes
+        pairs = np.sort(np.asarray(pairs, dtype=np.int64))
+
+        # Invert the first pair index of each row, then fix float rounding
+        row = np.floor((2 * n - 1 - np.sqrt((2 * n - 1) ** 2 - 8 * pairs.astype(float))) / 2).astype(np.int64)
+        row -= row_start(row, n) > pairs
+        row += row_start(row + 1, n) <= pairs
+        col = pairs - row_start(row, n) + row + 1
+
+        return cls(n, row, col)
+
+    @classmethod
+    def from_networkx(cls, G):
+        '''Converts a networkx graph, numbering the nodes in the order of G.nodes'''
+
+        index = {v: i for i, v in enumerate(G.nodes)}
+        edges = np.array([(index[u], index[v]) for u, v in G.edges if u != v], dtype=np.int32).reshape(-1, 2)
+
+        return cls(len(index), edges[:, 0], edges[:, 1])
+
+    def to_networkx(self):
+        '''Returns the graph as a networkx.Graph (imports networkx)'''
+
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(range(self.num_nodes))
+        G.add_edges_from(zip(self.row.tolist(), self.col.tolist()))
+
+        return G
+
+    def number_of_nodes(self):
+        '''Returns the number of nodes, as networkx.Graph.number_of_nodes'''
+
+        return self.num_nodes
+
+    def number_of_edges(self):
+        '''Returns the number of edges, as networkx.Graph.number_of_edges'''
+
+        return len(self.row)
+
+    @property
+    def edges(self):
+        '''(edges x 2) array of the edge endpoints'''
+
+        return np.column_stack((self.row, self.col))
+
+    def degree(self):
+        '''Returns the degree of every node'''
+
+        return np.bincount(self.row, minlength=self.num_nodes) + np.bincount(self.col, minlength=self.num_nodes)
+
+    def adjacency(self):
+        """Returns the CSR index (indptr, neighbours, edge ids) of the graph.
+
+        The neighbours of node v are neighbours[indptr[v]:indptr[v+1]] and
+        edge_ids gives the position of each of those edges in row and col.
+        """
+        if self._adjacency is None:
+            source = np.concatenate((self.row, self.col))
+            target = np.concatenate((self.col, self.row))
+            edge_ids = np.tile(np.arange(len(self.row), dtype=np.int64), 2)
+
+            order = np.argsort(source, kind='stable')
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(source, minlength=self.num_nodes))))
+            self._adjacency = (indptr, target[order], edge_ids[order])
+
+        return self._adjacency
+
+    def neighbors(self, v):
+        '''Returns the neighbours of node v, as networkx.Graph.neighbors'''
+
+        indptr, neighbours, _ = self.adjacency()
+
+        return neighbours[indptr[v]:indptr[v+1]]
+
+def as_edge_list(G):
+    '''Returns G as an EdgeListGraph, converting networkx graphs'''
+
+    if isinstance(G, EdgeListGraph):
+        return G
+
+    return EdgeListGraph.from_networkx(G)
+
+def as_networkx(G):
+    '''Returns G as a networkx graph, converting EdgeListGraph (imports networkx)'''
+
+    if isinstance(G, EdgeListGraph):
+        return G.to_networkx()
+
+    return G
+
+def random_signs(num_edges, seed=None):
+    """Randomly assigns a friendly (+1) or hostile (-1) relationship to each edge.
+
+    Args:
+        num_edges (int): Number of edges
+        seed (int): Random seed
+
+    Returns:
+        int8 numpy array of +1 and -1
+    """
+    rng = np.random.default_rng(seed)
+
+    return (2 * rng.integers(2, size=num_edges) - 1).astype(np.int8)
+
+def friends_enemies_bqm(edges, signs, num_nodes=None):
+    """Builds the friends and enemies BQM from arrays.
+
+    Each edge (i, j) with sign s adds s to the linear biases of i and j and
+    -2*s to their interaction, so it costs s when i and j are split into
+    different sets: friends want to be together, enemies apart.
+
+    Args:
+        edges (array): (edges x 2) array of node indices
+        signs (array): Sign of each edge, +1 friendly and -1 hostile
+        num_nodes (int): Number of nodes (variables 0 .. num_nodes-1); by
+            default the largest node index in edges plus one
+
+    Returns:
+        :obj:`BinaryQuadraticModel`: A binary-valued binary quadratic model
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    signs = np.asarray(signs, dtype=float)
+
+    if num_nodes is None:
+        num_nodes = int(edges.max()) + 1 if len(edges) else 0
+
+    linear = np.bincount(edges[:, 0], signs, num_nodes) + np.bincount(edges[:, 1], signs, num_nodes)
+
+    return BinaryQuadraticModel.from_numpy_vectors(linear, (edges[:, 0], edges[:, 1], -2 * signs), 0, 'BINARY')
+
+def bqm_relationships(bqm):
+    """Returns the edges and relationship weights of a friends and enemies BQM.
+
+    Repeated relationships between two people add up in the BQM, so the
+    weight of a pair is their sum (+1 or -1 for a single relationship), and
+    pairs whose relationships cancel out are left out.
+
+    Returns:
+        Tuple (nodes, row, col, weights): the BQM variables and, for each
+        interaction, the positions of its two people in nodes and its weight
+        (the interaction of an edge is -2*weight)
+    """
+    nodes = list(bqm.variables)
+    _, (row, col, quadratic), _ = bqm.to_numpy_vectors(variable_order=nodes)
+
+    keep = quadratic != 0
+
+    return nodes, row[keep], col[keep], -quadratic[keep] / 2
+
+def solution_array(sampleset, nodes):
+    '''Returns the best sample as a 0/1 array in the order of nodes (missing nodes are in set 0)'''
+
+    best = sampleset.first.sample
+
+    return np.array([best[v] if v in best else 0 for v in nodes], dtype=np.int8)
+
+def relationship_tally(solution, row, col, signs):
+    """Counts the friendly and hostile relationships within and between the two sets.
+
+    Args:
+        solution (array): Set (0 or 1) of each node
+        row, col (array): Endpoints of each edge
+        signs (array): Sign (or weight) of each edge, positive friendly and
+            negative hostile; zero-weight edges (relationships that cancel
+            out) are not counted
+
+    Returns:
+        (3 x 2) numpy array: rows are set 0, set 1 and the edges between the
+        sets (0 -> 1), columns the friendly and hostile counts
+    """
+    solution = np.asarray(solution, dtype=np.int64)
+    signs = np.asarray(signs)
+    counted = signs != 0
+
+    # 0: both in set 0, 1: between the sets, 2: both in set 1
+    placement = solution[np.asarray(row)[counted]] + solution[np.asarray(col)[counted]]
+    hostile = signs[counted] < 0
+
+    counts = np.bincount(2 * placement + hostile, minlength=6).reshape(3, 2)
+
+    return counts[[0, 2, 1]]